@@ -0,0 +1,121 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+
+SHARED_TOKEN_KEY = 'auth:token:{}'
+STATELESS_USER_FIELDS = (
+    'username', 'email', 'first_name', 'last_name', 'is_staff',
+)
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш токен -> пользователь со временем жизни."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            user, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self.lock:
+            self.items[key] = (user, time.monotonic() + self.ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def get_cached_user(key):
+    """Метод поиска пользователя токена в локальном и общем кэше."""
+    user = token_cache.get(key)
+    if user is None and settings.TOKEN_CACHE_SHARED:
+        user = cache.get(SHARED_TOKEN_KEY.format(key))
+        if user is not None:
+            token_cache.set(key, user)
+    return user
+
+
+def cache_user(key, user):
+    """Метод сохранения пользователя токена в кэши."""
+    token_cache.set(key, user)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.set(SHARED_TOKEN_KEY.format(key), user,
+                  settings.TOKEN_CACHE_TTL)
+
+
+def invalidate_tokens(*keys):
+    """Метод удаления токенов из кэшей.
+
+    Локальные кэши других процессов очищаются по истечении
+    TOKEN_CACHE_TTL.
+    """
+    for key in keys:
+        token_cache.delete(key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete_many([SHARED_TOKEN_KEY.format(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя."""
+
+    def authenticate_credentials(self, key):
+        user = get_cached_user(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache_user(key, user)
+            return user, token
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без обращения к базе.
+
+    Пользователь собирается из подписанных полей токена, поэтому
+    изменения профиля и блокировка вступают в силу после истечения
+    ACCESS_TOKEN_LIFETIME.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+        return User(
+            id=user_id,
+            is_active=True,
+            **{field: validated_token.get(field, '')
+               for field in STATELESS_USER_FIELDS},
+        )
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Tag
+
+TAGS_KEY = 'catalog:tags'
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+
+
+def get_tags():
+    """Метод получения списка тегов из кэша.
+
+    Тегов немного и меняются они редко, поэтому список целиком
+    хранится в кэше и сбрасывается сигналом при изменении тега.
+    """
+    tags = cache.get(TAGS_KEY)
+    if tags is None:
+        tags = list(Tag.objects.order_by('id').values(*TAG_FIELDS))
+        cache.set(TAGS_KEY, tags, settings.TAG_CACHE_TTL)
+    return tags
+
+
+def tag_choices():
+    """Метод вариантов фильтра рецептов по слагу тега."""
+    return [(tag['slug'], tag['name']) for tag in get_tags()]
+
+
+def tag_ids(slugs):
+    """Метод перевода слагов тегов в идентификаторы."""
+    return [tag['id'] for tag in get_tags() if tag['slug'] in slugs]
+
+
+def invalidate_tags():
+    """Метод сброса кэша тегов."""
+    cache.delete(TAGS_KEY)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Кэши, которые сбрасываются при записи или хранят счетчики лимитов и
+# должны быть общими для воркеров.
+SHARED_CACHES = ('default', 'throttle')
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Предупреждение о кэшах в памяти процесса в боевом окружении."""
+    return [
+        Warning(
+            f'Кэш {alias} хранится в памяти процесса и не общий для '
+            f'воркеров.',
+            hint='Задайте REDIS_URL или общий CACHE_BACKEND.',
+            id='api.W001')
+        for alias in SHARED_CACHES
+        if settings.CACHES[alias]['BACKEND'] == settings.LOCAL_CACHE_BACKEND
+    ]
@@ -0,0 +1,132 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from foodgram.compression import invalidate_response_cache
+from recipes.models import (
+    Favorite, IngredientAmount, Recipe, RecipeStats, ShoppingCart,
+    ShoppingListItem, SimilarRecipe, TagRecipe,
+)
+from users.models import Subscription, User
+from .matching import unindex_recipe
+from .purge import purge
+from .shopping_list import apply_deltas, recipe_amounts
+
+# Удаление связей частями: каскад Django загружает все связанные строки
+# в память и держит запрос, пока не удалит их.
+DELETE_CHUNK_SIZE = 1000
+
+
+def soft_delete_recipe(recipe):
+    """Метод скрытия рецепта до очистки командой purge_deleted.
+
+    Рецепт сразу убирается из индекса подбора. Корзины с ним удаляет
+    purge_deleted, до того списки покупок читаются без его продуктов.
+    """
+    Recipe.all_objects.filter(id=recipe.id).update(
+        deleted_at=timezone.now())
+    unindex_recipe(recipe.id)
+    invalidate_response_cache()
+    purge('recipes')
+
+
+def soft_delete_user(user):
+    """Метод скрытия пользователя и его рецептов до очистки.
+
+    Пользователь блокируется, его токены удаляются, рецепты скрываются
+    одним UPDATE без загрузки в память. Затем рецепты убираются из
+    индекса подбора, как при скрытии одного рецепта.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        user.is_active = False
+        user.deleted_at = now
+        user.save(update_fields=['is_active', 'deleted_at'])
+        Recipe.objects.filter(author=user).update(deleted_at=now)
+        Token.objects.filter(user=user).delete()
+    for recipe_id in list(Recipe.all_objects.filter(
+            author=user, deleted_at=now).values_list('id', flat=True)):
+        unindex_recipe(recipe_id)
+    invalidate_response_cache()
+    purge('recipes')
+
+
+def delete_in_chunks(queryset, chunk_size=DELETE_CHUNK_SIZE):
+    """Метод удаления строк частями по первичному ключу.
+
+    Каждая часть удаляется одним DELETE без сборщика каскада и сигналов
+    в своей транзакции, поэтому память не растет с числом строк.
+    """
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += queryset.model._base_manager.filter(
+                pk__in=ids)._raw_delete(queryset.db)
+
+
+def drop_carts(recipe_id, chunk_size=DELETE_CHUNK_SIZE):
+    """Метод удаления рецепта из всех корзин.
+
+    Продукты рецепта вычитаются из списков покупок по частям корзин,
+    каждая часть вычитается и удаляется в своей транзакции.
+    """
+    amounts = {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()
+    }
+    carts = ShoppingCart.objects.filter(recipe_id=recipe_id).order_by('pk')
+    while True:
+        with transaction.atomic():
+            rows = list(carts.values_list('pk', 'user_id')[:chunk_size])
+            if not rows:
+                return
+            apply_deltas([user_id for _, user_id in rows], amounts)
+            ShoppingCart.objects.filter(
+                pk__in=[pk for pk, _ in rows])._raw_delete(carts.db)
+
+
+def purge_recipe(recipe_id, chunk_size=DELETE_CHUNK_SIZE):
+    """Метод окончательного удаления скрытого рецепта.
+
+    Корзины, добавленные до скрытия рецепта, удаляются с вычитанием
+    продуктов; состав рецепта удаляется только после корзин, чтобы
+    вычитание видело количества.
+    """
+    drop_carts(recipe_id, chunk_size)
+    for queryset in (
+            Favorite.objects.filter(recipe_id=recipe_id),
+            TagRecipe.objects.filter(recipe_id=recipe_id),
+            IngredientAmount.objects.filter(recipe_id=recipe_id),
+            SimilarRecipe.objects.filter(recipe_id=recipe_id),
+            SimilarRecipe.objects.filter(similar_id=recipe_id),
+            RecipeStats.objects.filter(recipe_id=recipe_id)):
+        delete_in_chunks(queryset, chunk_size)
+    # Связей не осталось: каскад Django только проверит таблицы и
+    # отправит сигналы удаления рецепта.
+    Recipe.all_objects.filter(id=recipe_id).delete()
+
+
+def purge_user(user_id, chunk_size=DELETE_CHUNK_SIZE):
+    """Метод окончательного удаления скрытого пользователя.
+
+    Список покупок удаляется целиком, поэтому корзины пользователя
+    удаляются без пересчета итогов.
+    """
+    recipes = Recipe.all_objects.filter(author_id=user_id).order_by('id')
+    while True:
+        recipe_ids = list(recipes.values_list('id', flat=True)[:chunk_size])
+        if not recipe_ids:
+            break
+        for recipe_id in recipe_ids:
+            purge_recipe(recipe_id, chunk_size)
+    for queryset in (
+            ShoppingListItem.objects.filter(user_id=user_id),
+            ShoppingCart.objects.filter(user_id=user_id),
+            Favorite.objects.filter(user_id=user_id),
+            Subscription.objects.filter(user_id=user_id),
+            Subscription.objects.filter(following_id=user_id)):
+        delete_in_chunks(queryset, chunk_size)
+    User.objects.filter(id=user_id).delete()
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from recipes.models import Ingredient, IngredientAmount, Recipe, TagRecipe
+
+# Порядок полей задан явно: jsonb в PostgreSQL не сохраняет порядок
+# ключей, и при выдаче словари собираются заново в порядке ответа API.
+DOCUMENT_AUTHOR_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name')
+DOCUMENT_INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit', 'amount')
+DOCUMENT_TAG_FIELDS = ('id', 'name', 'color', 'slug')
+DOCUMENT_RELATIONS = ('author', 'ingredients', 'tags')
+REFRESH_CHUNK_SIZE = 500
+
+
+def build_documents(recipe_ids):
+    """Метод сборки документов рецептов тремя запросами.
+
+    Документ хранит развернутые связи рецепта в виде RecipeSerializer:
+    автора без is_subscribed, теги и ингредиенты с количеством.
+    """
+    documents = {}
+    for row in Recipe.objects.filter(id__in=recipe_ids).values(
+            'id', *(f'author__{field}' for field in DOCUMENT_AUTHOR_FIELDS)):
+        documents[row['id']] = {
+            'author': {
+                field: row[f'author__{field}']
+                for field in DOCUMENT_AUTHOR_FIELDS
+            },
+            'ingredients': [],
+            'tags': [],
+        }
+    ingredients = defaultdict(list)
+    for row in IngredientAmount.objects.filter(
+            recipe_id__in=documents).values(
+                'recipe_id', 'ingredient__id', 'ingredient__name',
+                'ingredient__measurement_unit', 'amount').order_by('id'):
+        row['ingredient__amount'] = row['amount']
+        ingredients[row['recipe_id']].append({
+            field: row[f'ingredient__{field}']
+            for field in DOCUMENT_INGREDIENT_FIELDS
+        })
+    tags = defaultdict(list)
+    for row in TagRecipe.objects.filter(recipe_id__in=documents).values(
+            'recipe_id', *(f'tag__{field}' for field in DOCUMENT_TAG_FIELDS)
+            ).order_by('tag_id'):
+        tags[row['recipe_id']].append({
+            field: row[f'tag__{field}'] for field in DOCUMENT_TAG_FIELDS})
+    for recipe_id, document in documents.items():
+        document['ingredients'] = ingredients[recipe_id]
+        document['tags'] = tags[recipe_id]
+    return documents
+
+
+def refresh_document(recipe):
+    """Метод пересборки документа одного рецепта.
+
+    Документ пишется через update(), без сигналов, и присваивается
+    экземпляру, чтобы его последующий save() не вернул старый.
+    """
+    recipe.document = build_documents([recipe.id])[recipe.id]
+    Recipe.objects.filter(id=recipe.id).update(document=recipe.document)
+
+
+def refresh_documents(recipe_ids, chunk_size=REFRESH_CHUNK_SIZE):
+    """Метод пересборки документов рецептов частями."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), chunk_size):
+        documents = build_documents(recipe_ids[start:start + chunk_size])
+        Recipe.objects.bulk_update([
+            Recipe(id=recipe_id, document=document)
+            for recipe_id, document in documents.items()
+        ], ['document'])
+
+
+def get_documents(recipes):
+    """Метод получения документов страницы рецептов.
+
+    Документы берутся из загруженных рецептов, недостающие - у рецептов
+    до пересборки или загруженных без колонки - собираются на лету.
+    """
+    documents = {
+        recipe.id: recipe.document for recipe in recipes
+        if 'document' not in recipe.get_deferred_fields()
+        and recipe.document is not None
+    }
+    missing = [recipe.id for recipe in recipes if recipe.id not in documents]
+    if missing:
+        documents.update(build_documents(missing))
+    return documents
+
+
+def referencing_recipe_ids(instance):
+    """Метод выбора рецептов, в документах которых есть тег или продукт."""
+    if isinstance(instance, Ingredient):
+        queryset = IngredientAmount.objects.filter(ingredient=instance)
+    else:
+        queryset = TagRecipe.objects.filter(tag=instance)
+    return list(queryset.values_list('recipe_id', flat=True))
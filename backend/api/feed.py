@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Recipe
+from users.models import Subscription
+
+TIMELINE_KEY = 'feed:timeline:{}'
+FAN_OUT_CHUNK_SIZE = 500
+
+
+def get_feed_queryset(user):
+    """Рецепты авторов, на которых подписан пользователь, одним запросом."""
+    return Recipe.objects.filter(author__following__user=user)
+
+
+def get_timeline(user):
+    """Метод получения id последних рецептов ленты из кэша.
+
+    При промахе лента собирается одним запросом и кладется в кэш.
+    """
+    key = TIMELINE_KEY.format(user.id)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = list(
+            get_feed_queryset(user).order_by('-pub_date').values_list(
+                'id', flat=True)[:settings.FEED_TIMELINE_SIZE])
+        cache.set(key, timeline, settings.FEED_TIMELINE_TTL)
+    return timeline
+
+
+def get_feed_page_queryset(user, page_size, first_page):
+    """Метод выбора источника ленты для страницы.
+
+    Первая страница отдается из предрасчитанной ленты, если она
+    длиннее страницы, остальные - keyset-запросом к базе.
+    """
+    queryset = get_feed_queryset(user)
+    if settings.FEED_TIMELINE_ENABLED and first_page:
+        timeline = get_timeline(user)
+        if len(timeline) > page_size:
+            queryset = Recipe.objects.filter(id__in=timeline)
+    return queryset
+
+
+def push_to_timelines(recipe):
+    """Метод добавления нового рецепта в ленты подписчиков автора.
+
+    Обновляются только уже собранные ленты, остальные соберутся
+    при первом чтении.
+    """
+    if not settings.FEED_TIMELINE_ENABLED:
+        return
+    follower_ids = Subscription.objects.filter(
+        following_id=recipe.author_id).values_list('user_id', flat=True)
+    keys = []
+    for user_id in follower_ids.iterator():
+        keys.append(TIMELINE_KEY.format(user_id))
+        if len(keys) == FAN_OUT_CHUNK_SIZE:
+            _prepend(keys, recipe.id)
+            keys = []
+    if keys:
+        _prepend(keys, recipe.id)
+
+
+def _prepend(keys, recipe_id):
+    timelines = cache.get_many(keys)
+    cache.set_many(
+        {key: [recipe_id, *timeline][:settings.FEED_TIMELINE_SIZE]
+         for key, timeline in timelines.items()},
+        settings.FEED_TIMELINE_TTL)
+
+
+def drop_timeline(user):
+    """Метод сброса ленты пользователя после изменения подписок."""
+    cache.delete(TIMELINE_KEY.format(user.id))
@@ -0,0 +1,33 @@
+from rest_framework.exceptions import ValidationError
+
+
+def split_param(value):
+    """Метод разбора списка через запятую из параметра запроса."""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def parse_fieldset(request, allowed, expandable=()):
+    """Метод разбора параметров ?fields= и ?expand=.
+
+    Без параметров возвращает (None, None) - полный ответ. Если задан
+    хотя бы один из них, связанные объекты, не перечисленные в expand,
+    отдаются идентификаторами. Поля возвращаются в порядке allowed.
+    """
+    fields = split_param(request.GET.get('fields'))
+    expand = split_param(request.GET.get('expand'))
+    if fields is None and expand is None:
+        return None, None
+    errors = {}
+    if fields is not None and not fields <= set(allowed):
+        errors['fields'] = (
+            'Неизвестные поля: ' + ', '.join(sorted(fields - set(allowed))))
+    if expand is not None and not expand <= set(expandable):
+        errors['expand'] = (
+            'Нельзя раскрыть: ' + ', '.join(sorted(expand - set(expandable))))
+    if errors:
+        raise ValidationError(errors)
+    if fields is not None:
+        allowed = [name for name in allowed if name in fields]
+    return tuple(allowed), expand or set()
@@ -1,8 +1,10 @@
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as django_filter
 from rest_framework import filters
 
-from recipes.models import Recipe
+from recipes.models import Recipe, TagRecipe
 from users.models import User
+from .catalog import tag_choices, tag_ids
 
 
 class SearchIngredientFilter(filters.SearchFilter):
@@ -12,16 +14,37 @@ class SearchIngredientFilter(filters.SearchFilter):
 
 class RecipeFilter(django_filter.FilterSet):
     """Настройка фильтров модели рецептов."""
+    RANKINGS = {
+        'popular': 'stats__popularity',
+        'trending': 'stats__trending',
+    }
+
     author = django_filter.ModelChoiceFilter(queryset=User.objects.all())
-    tags = django_filter.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = django_filter.MultipleChoiceFilter(
+        choices=tag_choices, method='get_tags')
     is_favorited = django_filter.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = django_filter.BooleanFilter(
         method='get_is_in_shopping_cart')
+    ordering = django_filter.ChoiceFilter(
+        choices=[(ranking, ranking) for ranking in RANKINGS],
+        method='get_ordering')
 
     class Meta:
         """Мета параметры фильтров модели рецептов."""
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'ordering')
+
+    def get_tags(self, queryset, name, value):
+        """Метод фильтрации по тегам подзапросом EXISTS.
+
+        В отличие от JOIN через TagRecipe рецепт с несколькими
+        выбранными тегами попадает в выдачу один раз без DISTINCT.
+        """
+        if not value:
+            return queryset
+        return queryset.filter(Exists(TagRecipe.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=tag_ids(value))))
 
     def get_is_favorited(self, queryset, name, value):
         """Метод обработки фильтров параметра is_favorited."""
@@ -34,3 +57,8 @@ class RecipeFilter(django_filter.FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(shoppingcarts__user=self.request.user)
         return queryset.all()
+
+    def get_ordering(self, queryset, name, value):
+        """Метод сортировки по материализованному рейтингу рецептов."""
+        return queryset.order_by(
+            F(self.RANKINGS[value]).desc(nulls_last=True), '-pub_date')
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from recipes.models import Favorite, ShoppingCart
+from .documents import (
+    DOCUMENT_AUTHOR_FIELDS, DOCUMENT_INGREDIENT_FIELDS, DOCUMENT_RELATIONS,
+    DOCUMENT_TAG_FIELDS, get_documents,
+)
+from .mixins import followed_ids
+
+RECIPE_FIELDS = (
+    'id', 'author', 'name', 'image', 'text', 'ingredients', 'tags',
+    'cooking_time', 'is_in_shopping_cart', 'is_favorited',
+)
+RECIPE_EXPANDABLE = ('author', 'ingredients', 'tags')
+RECIPE_COLUMNS = ('author', 'name', 'image', 'text', 'cooking_time')
+
+
+def recipe_columns(fields=None):
+    """Метод выбора колонок рецепта, нужных для набора полей.
+
+    pub_date загружается всегда: по нему строится курсор ленты.
+    """
+    columns = ['id', 'pub_date'] + [
+        column for column in RECIPE_COLUMNS
+        if fields is None or column in fields
+    ]
+    if fields is None or set(fields) & set(DOCUMENT_RELATIONS):
+        columns.append('document')
+    return columns
+
+
+def serialize_recipes(recipes, request, fields=None, expand=None):
+    """Метод сериализации страницы рецептов без ModelSerializer.
+
+    Собирает словари того же вида, что RecipeSerializer. Автор, теги и
+    ингредиенты берутся из сохраненного документа рецепта, поверх
+    которого накладываются отметки пользователя. Запросы для полей вне
+    fields не выполняются, связи вне expand отдаются идентификаторами.
+    """
+    fields = RECIPE_FIELDS if fields is None else fields
+    expand = set(RECIPE_EXPANDABLE) if expand is None else expand
+    recipes = list(recipes)
+    recipe_ids = [recipe.id for recipe in recipes]
+    user = request.user
+    extra = defaultdict(dict)
+    documents = {}
+    if ({'ingredients', 'tags'} & set(fields)
+            or 'author' in fields and 'author' in expand):
+        documents = get_documents(recipes)
+    if 'author' in fields and 'author' in expand:
+        followed = followed_ids(request)
+        for recipe in recipes:
+            author = documents[recipe.id]['author']
+            extra[recipe.id]['author'] = {
+                **{field: author[field] for field in DOCUMENT_AUTHOR_FIELDS},
+                'is_subscribed': author['id'] in followed,
+            }
+    elif 'author' in fields:
+        for recipe in recipes:
+            extra[recipe.id]['author'] = recipe.author_id
+    if 'ingredients' in fields:
+        ingredient_fields = (DOCUMENT_INGREDIENT_FIELDS
+                             if 'ingredients' in expand else ('id', 'amount'))
+        for recipe in recipes:
+            extra[recipe.id]['ingredients'] = [
+                {field: ingredient[field] for field in ingredient_fields}
+                for ingredient in documents[recipe.id]['ingredients']
+            ]
+    if 'tags' in fields:
+        for recipe in recipes:
+            tags = documents[recipe.id]['tags']
+            extra[recipe.id]['tags'] = [
+                {field: tag[field] for field in DOCUMENT_TAG_FIELDS}
+                if 'tags' in expand else tag['id']
+                for tag in tags
+            ]
+    for field, model in (('is_in_shopping_cart', ShoppingCart),
+                         ('is_favorited', Favorite)):
+        if field not in fields:
+            continue
+        marked = set()
+        if user.is_authenticated:
+            marked = set(model.objects.filter(
+                user=user, recipe_id__in=recipe_ids).values_list(
+                    'recipe_id', flat=True))
+        for recipe in recipes:
+            extra[recipe.id][field] = recipe.id in marked
+    results = []
+    for recipe in recipes:
+        data = {}
+        for field in fields:
+            if field in extra[recipe.id]:
+                data[field] = extra[recipe.id][field]
+            elif field == 'image':
+                data[field] = (request.build_absolute_uri(recipe.image.url)
+                               if recipe.image else None)
+            else:
+                data[field] = getattr(recipe, field)
+        results.append(data)
+    return results
@@ -0,0 +1,105 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+HEAVY_MODULES = ('reportlab', 'PIL', 'numpy', 'scipy')
+# Замер выполняется в отдельном интерпретаторе, чтобы импорты команды
+# и manage.py не попали в результат.
+CHILD = '''
+import gc, json, os, resource, sys, time
+warm, freeze = sys.argv[1] == 'True', sys.argv[2] == 'True'
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+import foodgram.wsgi
+get_resolver().url_patterns
+boot = time.perf_counter() - start
+warmup = 0
+if warm:
+    from api.warmup import warm_up
+    start = time.perf_counter()
+    warm_up()
+    warmup = time.perf_counter() - start
+if freeze:
+    gc.freeze()
+
+
+def private_kb(pid):
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file:
+            return sum(int(line.split()[1]) for line in file
+                       if line.startswith(('Private_Clean', 'Private_Dirty')))
+    except OSError:
+        return None
+
+
+read, write = os.pipe()
+pid = os.fork()
+if pid == 0:
+    os.close(read)
+    gc.collect()
+    os.write(write, b'1')
+    os.close(write)
+    time.sleep(5)
+    os._exit(0)
+os.close(write)
+os.read(read, 1)
+worker = private_kb(pid)
+os.kill(pid, 9)
+os.waitpid(pid, 0)
+print(json.dumps({
+    'boot': boot,
+    'warmup': warmup,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'worker': worker,
+    'heavy': [name for name in sys.argv[3:] if name in sys.modules],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Замеряет загрузку приложения в отдельном процессе: время '
+            'до готовности маршрутов, время прогрева warm_up, пиковый RSS '
+            'и загруженные тяжелые модули. Для оценки preload_app процесс '
+            'делает fork, в потомке выполняется сборка мусора, как в '
+            'воркере, и выводится его собственная память (Private из '
+            '/proc, только Linux). Режимы: cold - без прогрева, warm - с '
+            'warm_up, preload - с warm_up и gc.freeze, как в '
+            'gunicorn.conf.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'foodgram.settings'))
+        for mode, warm, freeze in (
+                ('cold', False, False), ('warm', True, False),
+                ('preload', True, True)):
+            results = [
+                json.loads(subprocess.run(
+                    [sys.executable, '-c', CHILD, str(warm), str(freeze),
+                     *HEAVY_MODULES],
+                    env=env, capture_output=True, text=True, check=True,
+                ).stdout.splitlines()[-1])
+                for _ in range(options['runs'])
+            ]
+            worker = [result['worker'] for result in results
+                      if result['worker'] is not None]
+            self.stdout.write(
+                f'{mode}: загрузка '
+                f'{statistics.median(r["boot"] for r in results) * 1000:.0f}'
+                f' мс, прогрев '
+                f'{statistics.median(r["warmup"] for r in results) * 1000:.0f}'
+                f' мс, RSS '
+                f'{statistics.median(r["rss"] for r in results) / 1024:.1f}'
+                f' МБ, своя память воркера '
+                + (f'{statistics.median(worker) / 1024:.1f} МБ'
+                   if worker else 'нет данных')
+                + ', тяжелые модули: '
+                + (', '.join(results[0]['heavy']) or 'нет'))
@@ -0,0 +1,57 @@
+import random
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.matching import IngredientIndex
+
+
+class Command(BaseCommand):
+    help = ('Замеряет построение индекса продуктов и подбор рецептов '
+            'на синтетических данных, без обращения к базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, nargs='+',
+                            default=[10000, 100000])
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=10)
+        parser.add_argument('--query-size', type=int, default=8)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Популярные продукты встречаются в рецептах чаще остальных.
+        weights = [1 / rank for rank in range(1, options['ingredients'] + 1)]
+        ingredient_ids = range(1, options['ingredients'] + 1)
+        for recipes_count in options['recipes']:
+            pairs = [
+                (recipe_id, ingredient_id)
+                for recipe_id in range(1, recipes_count + 1)
+                for ingredient_id in set(rng.choices(
+                    ingredient_ids, weights, k=options['per_recipe']))
+            ]
+            started = time.perf_counter()
+            index = IngredientIndex.from_pairs(pairs)
+            build_time = time.perf_counter() - started
+            size = sum(
+                sys.getsizeof(posting)
+                for posting in index.postings.values()
+            ) + sum(
+                sys.getsizeof(ingredients)
+                for ingredients in index.recipe_ingredients.values()
+            )
+            queries = [
+                rng.choices(ingredient_ids, weights, k=options['query_size'])
+                for _ in range(options['queries'])
+            ]
+            started = time.perf_counter()
+            for query in queries:
+                index.match(query, limit=10)
+            query_time = (time.perf_counter() - started) / len(queries)
+            self.stdout.write(
+                f'рецептов: {recipes_count}, связей: {len(pairs)}, '
+                f'построение: {build_time:.2f} с, '
+                f'массивы: {size / 2 ** 20:.1f} МБ, '
+                f'запрос: {query_time * 1000:.2f} мс')
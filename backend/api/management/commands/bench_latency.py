@@ -0,0 +1,90 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку ответов сервера по keep-alive соединениям '
+            'и выводит перцентили. Для сравнения пула соединений запустите '
+            'два сервера с DB_POOL=True и DB_POOL=False. Пример: '
+            'bench_latency http://pool:8000/api/tags/ '
+            'http://nopool:8001/api/tags/')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Число запросов на один адрес')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Число одновременных клиентов')
+        parser.add_argument('--warmup', type=int, default=50,
+                            help='Число запросов на прогрев перед замером')
+        parser.add_argument('--token', help='Токен для заголовка Token')
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            self.run(url, options['warmup'], 1, options)
+            latencies, errors = self.run(
+                url, options['requests'], options['concurrency'], options)
+            latencies.sort()
+            self.stdout.write(
+                f'{url}: запросов: {len(latencies)}, ошибок: {errors}, ' +
+                ', '.join(
+                    f'p{percentile}: '
+                    f'{self.percentile(latencies, percentile) * 1000:.2f} мс'
+                    for percentile in (50, 90, 99)
+                ))
+
+    def run(self, url, requests, concurrency, options):
+        """Метод выполнения запросов в concurrency потоков."""
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda count: results.append(
+                    self.client(url, count, options['token'])),
+                args=(requests // concurrency
+                      + (index < requests % concurrency),))
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return ([latency for result in results for latency in result[0]],
+                sum(result[1] for result in results))
+
+    @staticmethod
+    def client(url, count, token):
+        """Клиент, отправляющий count запросов по одному соединению."""
+        parts = urlsplit(url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        connection = http.client.HTTPConnection(
+            parts.hostname, parts.port or 80, timeout=30)
+        latencies, errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            if response.status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+        connection.close()
+        return latencies, errors
+
+    @staticmethod
+    def percentile(values, percentile):
+        if not values:
+            return 0
+        return values[min(len(values) - 1, len(values) * percentile // 100)]
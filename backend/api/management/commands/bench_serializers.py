@@ -0,0 +1,128 @@
+import random
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.documents import refresh_documents
+from api.lean import serialize_recipes
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, ShoppingCart, Tag,
+    TagRecipe,
+)
+from users.models import Subscription, User
+
+
+class Command(BaseCommand):
+    help = ('Замеряет скорость RecipeSerializer и облегченной сериализации '
+            'serialize_recipes, JSONRenderer и ORJSONRenderer на страницах '
+            'синтетических рецептов. Совпадение их вывода проверяют тесты '
+            'tests/test_serializers.py. Данные создаются в транзакции, '
+            'которая откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Рецептов на странице')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Число повторов замера')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.create_data(options['recipes'],
+                                    random.Random(options['seed']))
+            recipes = list(Recipe.objects.order_by('-pub_date')[
+                :options['recipes']])
+            for request_user in (AnonymousUser(), user):
+                request = RequestFactory().get('/api/recipes/')
+                request.user = request_user
+                self.compare(recipes, request, options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, recipes, request, repeat):
+        """Метод замера путей сериализации для пользователя."""
+        full, full_time = self.measure(
+            lambda: RecipeSerializer(
+                recipes, many=True, context={'request': request}).data,
+            repeat)
+        _, lean_time = self.measure(
+            lambda: serialize_recipes(recipes, request), repeat)
+        _, json_time = self.measure(
+            lambda: JSONRenderer().render(full), repeat)
+        _, fast_json_time = self.measure(
+            lambda: ORJSONRenderer().render(full), repeat)
+        self.stdout.write(
+            f'{"аноним" if request.user.is_anonymous else "пользователь"}, '
+            f'рецептов: {len(recipes)}\n'
+            f'  RecipeSerializer: {full_time * 1000:.1f} мс, '
+            f'serialize_recipes: {lean_time * 1000:.1f} мс\n'
+            f'  JSONRenderer: {json_time * 1000:.2f} мс, '
+            f'ORJSONRenderer: {fast_json_time * 1000:.2f} мс\n'
+            f'  итого: {(full_time + json_time) * 1000:.1f} мс -> '
+            f'{(lean_time + fast_json_time) * 1000:.1f} мс')
+
+    @staticmethod
+    def measure(function, repeat):
+        """Метод замера среднего времени вызова."""
+        result = function()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return result, (time.perf_counter() - started) / repeat
+
+    @staticmethod
+    def create_data(recipes_count, rng):
+        """Метод создания авторов, рецептов и отметок пользователя."""
+        user = User.objects.create(
+            username='bench_reader', email='bench_reader@example.com')
+        authors = User.objects.bulk_create([
+            User(username=f'bench_author_{index}',
+                 email=f'bench_author_{index}@example.com',
+                 first_name='Автор', last_name=str(index))
+            for index in range(10)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'bench_tag_{index}', color=f'#00{index:02d}00',
+                slug=f'bench_tag_{index}')
+            for index in range(5)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'Продукт {index}', measurement_unit='г')
+            for index in range(200)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=rng.choice(authors), name=f'Рецепт {index}',
+                   image=f'recipes/image/bench_{index}.png',
+                   text='Описание рецепта', cooking_time=rng.randint(1, 300))
+            for index in range(recipes_count)
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in rng.sample(tags, 2)
+        ])
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(recipe=recipe, ingredient=ingredient,
+                             amount=rng.randint(1, 1000))
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients, 8)
+        ])
+        refresh_documents(recipe.id for recipe in recipes)
+        Subscription.objects.bulk_create([
+            Subscription(user=user, following=author)
+            for author in authors[:3]
+        ])
+        Favorite.objects.bulk_create([
+            Favorite(user=user, recipe=recipe)
+            for recipe in rng.sample(recipes, recipes_count // 4)
+        ])
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=user, recipe=recipe)
+            for recipe in rng.sample(recipes, recipes_count // 4)
+        ])
+        return user
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность серверов при медленных '
+            'клиентах: медленные клиенты отправляют запрос по строке с '
+            'паузами, а быстрые клиенты замеряют, сколько запросов сервер '
+            'успевает обслужить. С --slow-clients 0 замеряется сервер за '
+            'nginx, который сам дочитывает запросы медленных клиентов. '
+            'Пример: bench_slow_clients http://sync:8000/api/tags/ '
+            'http://async:8001/api/tags/')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--slow-clients', type=int, default=50,
+                            help='Число одновременных медленных клиентов')
+        parser.add_argument('--fast-clients', type=int, default=10,
+                            help='Число одновременных быстрых клиентов')
+        parser.add_argument('--duration', type=float, default=20,
+                            help='Длительность замера в секундах')
+        parser.add_argument('--delay', type=float, default=1,
+                            help='Пауза между строками запроса медленного '
+                                 'клиента в секундах')
+        parser.add_argument('--token', help='Токен для заголовка Token')
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            completed, errors, latencies = asyncio.run(self.run(url, options))
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] if latencies else 0
+            self.stdout.write(
+                f'{url}: {completed / options["duration"]:.1f} запр/с, '
+                f'ошибок: {errors}, p50: {p50 * 1000:.0f} мс')
+
+    async def run(self, url, options):
+        deadline = time.monotonic() + options['duration']
+        slow = [
+            asyncio.create_task(
+                self.client(url, options, deadline, options['delay']))
+            for _ in range(options['slow_clients'])
+        ]
+        results = await asyncio.gather(*[
+            self.client(url, options, deadline, 0)
+            for _ in range(options['fast_clients'])
+        ])
+        for task in slow:
+            task.cancel()
+        await asyncio.gather(*slow, return_exceptions=True)
+        latencies = [latency for result in results for latency in result[1]]
+        return (sum(result[0] for result in results),
+                sum(result[2] for result in results), latencies)
+
+    @staticmethod
+    async def client(url, options, deadline, delay):
+        """Клиент, отправляющий запрос по строке с паузой delay."""
+        parts = urlsplit(url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        lines = [
+            f'GET {path} HTTP/1.1\r\n',
+            f'Host: {parts.netloc}\r\n',
+            'Accept: application/json\r\n',
+            'Connection: close\r\n',
+        ]
+        if options['token']:
+            lines.append(f'Authorization: Token {options["token"]}\r\n')
+        lines.append('\r\n')
+        completed, latencies, errors = 0, [], 0
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80)
+                for line in lines:
+                    writer.write(line.encode())
+                    await writer.drain()
+                    if delay:
+                        await asyncio.sleep(delay)
+                status_line = await reader.readline()
+                await reader.read()
+                writer.close()
+            except OSError:
+                errors += 1
+                continue
+            if status_line.split()[1:2] == [b'200']:
+                completed += 1
+                latencies.append(time.monotonic() - started)
+            else:
+                errors += 1
+        return completed, latencies, errors
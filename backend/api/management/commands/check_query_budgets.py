@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.db.querywatch import QueryBudgetExceeded, assert_queries
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, ShoppingCart, Tag,
+    TagRecipe,
+)
+from users.models import Subscription, User
+
+# Маршруты и запросы к ним от имени читателя с подписками и корзиной.
+ENDPOINTS = (
+    ('recipes-list', '/api/recipes/?limit=10'),
+    ('recipes-list', '/api/recipes/?limit=10&tags=budget_tag_0'),
+    ('recipes-detail', '/api/recipes/{recipe}/'),
+    ('recipes-feed', '/api/recipes/feed/?limit=10'),
+    ('recipes-cook', '/api/recipes/cook/?ingredients={ingredient}'),
+    ('recipes-shopping-list', '/api/recipes/shopping_list/'),
+    ('users-list', '/api/users/?limit=10'),
+    ('users-detail', '/api/users/{author}/'),
+    ('users-me', '/api/users/me/'),
+    ('subscriptions', '/api/users/subscriptions/?limit=10'),
+    ('tags-list', '/api/tags/'),
+    ('ingredients-list', '/api/ingredients/?name=budget'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет бюджеты запросов QUERY_BUDGETS маршрутов рецептов, '
+            'подписок и пользователей: число запросов не должно превышать '
+            'бюджет и расти с числом строк, один запрос не должен '
+            'повторяться больше QUERY_REPEAT_THRESHOLD раз. Данные '
+            'создаются в транзакции, которая откатывается, кэши перед '
+            'каждым запросом очищаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10,
+                            help='Авторов на первом шаге, на втором - втрое '
+                                 'больше')
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            reader = User.objects.create(
+                username='budget_reader', email='budget_reader@example.com')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.
+                               create(user=reader).key)
+            context = self.create_data(reader, 0, options['rows'])
+            # Прогрев кэшей процесса: токенов и индекса продуктов.
+            for _, path in ENDPOINTS:
+                client.get(path.format(**context))
+            first = self.run_endpoints(client, context, failures)
+            self.create_data(reader, options['rows'], options['rows'] * 3)
+            second = self.run_endpoints(client, context, failures)
+            transaction.set_rollback(True)
+        for (name, path), before, after in zip(ENDPOINTS, first, second):
+            budget = settings.QUERY_BUDGETS.get(name)
+            self.stdout.write(
+                f'{path}: {before} -> {after} (бюджет {budget})')
+            if budget is None:
+                failures.append(f'{name}: бюджет не задан')
+            elif before != after:
+                failures.append(f'{path}: число запросов растет с данными')
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    @staticmethod
+    def run_endpoints(client, context, failures):
+        """Метод подсчета запросов маршрутов с проверкой бюджетов."""
+        counts = []
+        for name, path in ENDPOINTS:
+            for cache in caches.all():
+                cache.clear()
+            try:
+                with assert_queries(
+                        settings.QUERY_BUDGETS.get(name)) as watcher:
+                    response = client.get(path.format(**context))
+            except QueryBudgetExceeded as error:
+                failures.append(f'{path}:\n{error}')
+            else:
+                if response.status_code != 200:
+                    failures.append(f'{path}: ответ {response.status_code}')
+            counts.append(watcher.count)
+        return counts
+
+    @staticmethod
+    def create_data(reader, start, stop):
+        """Метод создания авторов с рецептами, подписок и отметок."""
+        authors = User.objects.bulk_create([
+            User(username=f'budget_author_{index}',
+                 email=f'budget_author_{index}@example.com')
+            for index in range(start, stop)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'budget_tag_{index}', color=f'#{index:06d}',
+                slug=f'budget_tag_{index}')
+            for index in range(start, stop)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'budget_{index}', measurement_unit='г')
+            for index in range(start, stop)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=author, name=f'budget_{author.username}_{number}',
+                   image='recipes/image/budget.png', text='-',
+                   cooking_time=1)
+            for author in authors
+            for number in range(2)
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in (tags[0], tags[-1])
+        ])
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in (ingredients[0], ingredients[-1])
+        ])
+        Subscription.objects.bulk_create([
+            Subscription(user=reader, following=author)
+            for author in authors
+        ])
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create([
+                model(user=reader, recipe=recipe) for recipe in recipes[::2]
+            ])
+        return {
+            'recipe': recipes[0].id,
+            'author': authors[0].id,
+            'ingredient': ingredients[0].id,
+        }
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.profiling import issue_token
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Выдает сотруднику подписанный токен профилирования. Запрос '
+            'с токеном в заголовке X-Profile или параметре ?profile= '
+            'выполняется под cProfile, профиль и журнал SQL сохраняются в '
+            'PROFILE_DIR. Токен действует PROFILE_TOKEN_MAX_AGE секунд и '
+            'только пока пользователь остается сотрудником.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None or not user.is_staff or not user.is_active:
+            raise CommandError('Токен выдается только активным сотрудникам')
+        self.stdout.write(issue_token(user))
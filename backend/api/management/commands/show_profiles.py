@@ -0,0 +1,49 @@
+import io
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.profiling import entry_names, entry_path, read_entry
+
+
+class Command(BaseCommand):
+    help = ('Показывает профили запросов из PROFILE_DIR. Без аргументов '
+            'выводит список профилей, с именем профиля - самые дорогие '
+            'функции по cProfile и журнал SQL запроса.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?',
+                            help='Имя профиля из заголовка X-Profile-Id')
+        parser.add_argument('--sort', default='cumulative',
+                            help='Сортировка pstats, по умолчанию cumulative')
+        parser.add_argument('--limit', type=int, default=30,
+                            help='Число выводимых функций')
+
+    def handle(self, *args, **options):
+        names = entry_names()
+        if not options['name']:
+            for name in reversed(names):
+                entry = read_entry(name)
+                self.stdout.write(
+                    f'{name}  {entry["method"]} {entry["path"]}  '
+                    f'{entry["status"]}  {entry["ms"]} мс  '
+                    f'запросов: {len(entry["queries"])}')
+            return
+        if options['name'] not in names:
+            raise CommandError(f'Профиль {options["name"]} не найден')
+        entry = read_entry(options['name'])
+        self.stdout.write(
+            f'{entry["method"]} {entry["path"]}: {entry["status"]}, '
+            f'{entry["ms"]} мс')
+        stream = io.StringIO()
+        pstats.Stats(
+            entry_path(options['name'], 'prof'), stream=stream
+        ).sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(stream.getvalue())
+        total = sum(query['ms'] for query in entry['queries'])
+        self.stdout.write(
+            f'Запросов SQL: {len(entry["queries"])}, {round(total, 3)} мс')
+        for query in entry['queries']:
+            self.stdout.write(
+                f'{query["ms"]:>9} мс  {query["alias"]}  {query["sql"]}  '
+                f'{query["params"]}')
@@ -0,0 +1,230 @@
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from recipes.models import IngredientAmount
+
+logger = logging.getLogger(__name__)
+
+POSTING_TYPECODE = 'I'
+
+
+class IngredientIndex:
+    """Инвертированный индекс: продукт -> отсортированные id рецептов.
+
+    Списки рецептов хранятся в компактных массивах, покрытие рецепта
+    считается пересечением набора продуктов пользователя со списками.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.recipe_ingredients = {}
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Метод построения индекса из пар (id рецепта, id продукта)."""
+        index = cls()
+        recipe_ingredients = {}
+        for recipe_id, ingredient_id in pairs:
+            recipe_ingredients.setdefault(
+                recipe_id, array(POSTING_TYPECODE)).append(ingredient_id)
+            index.postings.setdefault(
+                ingredient_id, array(POSTING_TYPECODE)).append(recipe_id)
+        for posting in index.postings.values():
+            posting[:] = array(POSTING_TYPECODE, sorted(posting))
+        index.recipe_ingredients = recipe_ingredients
+        return index
+
+    def __len__(self):
+        return len(self.recipe_ingredients)
+
+    def add_recipe(self, recipe_id, ingredient_ids):
+        """Метод добавления или замены рецепта в индексе."""
+        with self.lock:
+            self._remove(recipe_id)
+            ingredient_ids = array(POSTING_TYPECODE, set(ingredient_ids))
+            for ingredient_id in ingredient_ids:
+                insort(self.postings.setdefault(
+                    ingredient_id, array(POSTING_TYPECODE)), recipe_id)
+            self.recipe_ingredients[recipe_id] = ingredient_ids
+
+    def remove_recipe(self, recipe_id):
+        """Метод удаления рецепта из индекса."""
+        with self.lock:
+            self._remove(recipe_id)
+
+    def _remove(self, recipe_id):
+        for ingredient_id in self.recipe_ingredients.pop(recipe_id, ()):
+            posting = self.postings[ingredient_id]
+            position = bisect_left(posting, recipe_id)
+            if position < len(posting) and posting[position] == recipe_id:
+                del posting[position]
+
+    def match(self, ingredient_ids, limit=None):
+        """Метод ранжирования рецептов по покрытию набора продуктов.
+
+        Возвращает Matches с тройками (id рецепта, покрытие, число
+        совпавших продуктов) по убыванию покрытия, а с limit - список
+        первых limit троек.
+        """
+        matched = Counter()
+        with self.lock:
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self.postings.get(ingredient_id, ()))
+            scores = [
+                (count / len(self.recipe_ingredients[recipe_id]),
+                 count, recipe_id)
+                for recipe_id, count in matched.items()
+            ]
+        matches = Matches(scores)
+        return matches if limit is None else matches[:limit]
+
+
+class Matches:
+    """Результаты подбора, упорядочиваемые только до нужной страницы.
+
+    Пагинатор берет срез страницы, и heapq.nlargest отбирает рецепты до
+    ее конца вместо сортировки всех совпадений.
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) and key.stop is not None and (
+                key.stop >= 0 and key.step is None):
+            top = heapq.nlargest(key.stop, self.scores)
+        else:
+            top = sorted(self.scores, reverse=True)
+        return [(recipe_id, coverage, count)
+                for coverage, count, recipe_id in top[key]]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+_index = None
+_index_lock = threading.Lock()
+# Изменения рецептов во время построения индекса: (id, продукты или None).
+_changes = None
+_changes_lock = threading.Lock()
+
+
+def build_index():
+    """Метод построения индекса по всем продуктам в рецептах."""
+    pairs = IngredientAmount.objects.filter(
+        recipe__deleted_at__isnull=True).values_list(
+            'recipe_id', 'ingredient_id').order_by().iterator(
+                chunk_size=10000)
+    return IngredientIndex.from_pairs(pairs)
+
+
+def swap_index():
+    """Метод построения индекса и замены им текущего.
+
+    Изменения рецептов, сделанные после начала записи в _changes, то
+    есть во время построения, повторяются на новом индексе перед
+    заменой, иначе их затерла бы выборка, сделанная раньше.
+    """
+    global _index, _changes
+    try:
+        index = build_index()
+    except BaseException:
+        with _changes_lock:
+            _changes = None
+        raise
+    with _changes_lock:
+        for recipe_id, ingredient_ids in _changes:
+            if ingredient_ids is None:
+                index.remove_recipe(recipe_id)
+            else:
+                index.add_recipe(recipe_id, ingredient_ids)
+        _index = index
+        _changes = None
+    return index
+
+
+def record_changes():
+    """Метод начала записи изменений рецептов до построения индекса."""
+    global _changes
+    with _changes_lock:
+        _changes = []
+
+
+def rebuild_index():
+    """Метод пересборки индекса в фоновом потоке.
+
+    Вызывается с захваченным _index_lock и отпускает его по окончании.
+    """
+    try:
+        swap_index()
+    except DatabaseError:
+        logger.exception('Не удалось пересобрать индекс продуктов')
+    finally:
+        connections.close_all()
+        _index_lock.release()
+
+
+def get_index():
+    """Метод получения индекса процесса.
+
+    Изменения из других процессов подхватываются пересборкой
+    индекса раз в COOK_INDEX_TTL секунд. Пересборка идет в фоновом
+    потоке, а запросы до ее окончания получают прежний индекс; ждет
+    только первое построение.
+    """
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                record_changes()
+                return swap_index()
+            return _index
+    if (time.monotonic() - index.built_at > settings.COOK_INDEX_TTL
+            and _index_lock.acquire(blocking=False)):
+        if _index is index:
+            record_changes()
+            threading.Thread(target=rebuild_index, name='cook-index',
+                             daemon=True).start()
+        else:
+            _index_lock.release()
+    return index
+
+
+def apply_change(recipe_id, ingredient_ids):
+    """Метод изменения рецепта в индексе и записи для пересборки.
+
+    ingredient_ids равен None при удалении рецепта.
+    """
+    with _changes_lock:
+        if _index is not None:
+            if ingredient_ids is None:
+                _index.remove_recipe(recipe_id)
+            else:
+                _index.add_recipe(recipe_id, ingredient_ids)
+        if _changes is not None:
+            _changes.append((recipe_id, ingredient_ids))
+
+
+def index_recipe(recipe):
+    """Метод обновления рецепта в индексе."""
+    if _index is not None or _changes is not None:
+        apply_change(recipe.id, list(IngredientAmount.objects.filter(
+            recipe=recipe).values_list('ingredient_id', flat=True)))
+
+
+def unindex_recipe(recipe_id):
+    """Метод удаления рецепта из индекса."""
+    apply_change(recipe_id, None)
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import Http404
 from rest_framework import serializers, permissions, viewsets
 from rest_framework.response import Response
 
@@ -8,6 +9,61 @@ from recipes.models import (
     Favorite, Recipe, ShoppingCart,
 )
 from users.models import Subscription
+from .fieldsets import parse_fieldset
+from .toggles import link, unlink
+
+
+class SparseFieldsMixin:
+    """Класс отбора полей сериализатора по ?fields= и ?expand=.
+
+    Поля вне fields удаляются до сериализации, поэтому их
+    SerializerMethodField не выполняют запросов.
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expand = (set(self.expandable_fields)
+                       if expand is None else expand)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def readable_fields(cls):
+        """Метод получения имен полей, доступных для чтения."""
+        return [name for name, field in cls().fields.items()
+                if not field.write_only]
+
+
+class SparseFieldsViewMixin:
+    """Класс передачи ?fields= и ?expand= сериализатору при чтении."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if (self.request.method == 'GET'
+                and issubclass(serializer_class, SparseFieldsMixin)):
+            kwargs['fields'], kwargs['expand'] = parse_fieldset(
+                self.request, serializer_class.readable_fields(),
+                serializer_class.expandable_fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+def followed_ids(request):
+    """Метод получения id авторов, на которых подписан пользователь.
+
+    Множество загружается одним запросом и хранится в запросе, поэтому
+    все сериализаторы с вложенным пользователем в пределах запроса
+    обходятся без запросов на каждую строку.
+    """
+    if request.user.is_anonymous:
+        return frozenset()
+    followed = getattr(request, 'followed_ids', None)
+    if followed is None:
+        followed = request.followed_ids = frozenset(
+            Subscription.objects.filter(user=request.user).values_list(
+                'following_id', flat=True))
+    return followed
 
 
 class CommonSubscribedMixin(metaclass=serializers.SerializerMetaclass):
@@ -16,11 +72,7 @@ class CommonSubscribedMixin(metaclass=serializers.SerializerMetaclass):
 
     def get_is_subscribed(self, obj):
         """Метод обработки параметра is_subscribed подписок."""
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-                user=request.user, following__id=obj.id).exists()
+        return obj.id in followed_ids(self.context.get('request'))
 
 
 class CommonRecipeMixin(metaclass=serializers.SerializerMetaclass):
@@ -50,26 +102,58 @@ class CommonCountMixin(metaclass=serializers.SerializerMetaclass):
     recipes_count = serializers.SerializerMethodField()
 
     def get_recipes_count(self, obj):
-        """Метод подсчета количества рецептов автора."""
+        """Метод подсчета количества рецептов автора.
+
+        Берется аннотация recipes_count запроса представления, если она есть.
+        """
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return Recipe.objects.filter(author__id=obj.id).count()
 
 
 class BaseFavoriteCartViewSetMixin(viewsets.ModelViewSet):
     """Класс управления разрешениями."""
     permission_classes = [permissions.IsAuthenticated]
+    recipe_fields = ('id', 'name', 'cooking_time', 'image')
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
-        """Метод создания рецепта."""
-        recipe_id = int(self.kwargs['recipes_id'])
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        self.model.objects.create(
-            user=request.user, recipe=recipe)
-        return Response(HTTPStatus.CREATED)
+        """Метод добавления рецепта.
 
+        Повторное добавление не создает связь и возвращает 400.
+        """
+        recipe_id = self.kwargs['recipes_id']
+        row, created = link(
+            self.model, 'recipe', request.user.id, recipe_id,
+            self.recipe_fields)
+        if row is None:
+            raise Http404
+        if not created:
+            return Response({'errors': 'Рецепт уже добавлен.'},
+                            status=HTTPStatus.BAD_REQUEST)
+        self.linked(request.user.id, recipe_id)
+        serializer = self.get_serializer(
+            Recipe(**dict(zip(self.recipe_fields, row))))
+        return Response(serializer.data, status=HTTPStatus.CREATED)
+
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
-        """Метод удаления рецепта."""
+        """Метод удаления рецепта.
+
+        Удаление отсутствующего рецепта возвращает 400.
+        """
         recipe_id = self.kwargs['recipes_id']
-        user_id = request.user.id
-        get_object_or_404(
-            self.model, user__id=user_id, recipe__id=recipe_id).delete()
-        return Response(HTTPStatus.NO_CONTENT)
+        deleted = unlink(self.model, 'recipe', request.user.id, recipe_id)
+        if deleted is None:
+            raise Http404
+        if not deleted:
+            return Response({'errors': 'Рецепт не был добавлен.'},
+                            status=HTTPStatus.BAD_REQUEST)
+        self.unlinked(request.user.id, recipe_id)
+        return Response(status=HTTPStatus.NO_CONTENT)
+
+    def linked(self, user_id, recipe_id):
+        """Метод обработки добавленной связи, вместо сигнала post_save."""
+
+    def unlinked(self, user_id, recipe_id):
+        """Метод обработки удаленной связи, вместо сигнала pre_delete."""
@@ -1,6 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+
+
+class FeedPagination(CursorPagination):
+    """Курсорная (keyset) пагинация ленты подписок."""
+    page_size_query_param = 'limit'
+    page_size = 10
+    ordering = '-pub_date'
@@ -0,0 +1,108 @@
+import logging
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+from foodgram.compression import is_default_rendering
+from .view_counts import viewed_recipe_id
+
+logger = logging.getLogger(__name__)
+
+# Ключи ответов по имени маршрута. Ключ catalog есть у всех ответов с
+# рецептами: в них вложены теги и ингредиенты.
+ROUTE_KEYS = {
+    'tags-list': ('tags',),
+    'tags-detail': ('tags',),
+    'ingredients-list': ('ingredients',),
+    'ingredients-detail': ('ingredients',),
+    'recipes-list': ('recipes', 'catalog'),
+}
+
+
+def surrogate_keys(path):
+    """Метод выбора ключей ответа по пути запроса."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return ()
+    return ROUTE_KEYS.get(match.url_name, ())
+
+
+class NoopPurger:
+    """Пургер без внешнего кэша: ответы устаревают по EDGE_CACHE_TTL."""
+
+    def purge(self, keys):
+        pass
+
+
+class LocalPurger:
+    """Пургер, запоминающий ключи, для проверок и локального запуска."""
+
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.extend(keys)
+
+
+class HttpPurger:
+    """Пургер, отправляющий PURGE с заголовком Surrogate-Key.
+
+    Подходит для кэшей с инвалидацией по ключам (Varnish xkey, CDN).
+    Ошибки только логируются: запись уже сохранена, а устаревший ответ
+    живет не дольше EDGE_CACHE_TTL.
+    """
+
+    def purge(self, keys):
+        for url in settings.EDGE_PURGE_URLS:
+            try:
+                requests.request(
+                    'PURGE', url, headers={'Surrogate-Key': ' '.join(keys)},
+                    timeout=settings.EDGE_PURGE_TIMEOUT).raise_for_status()
+            except requests.RequestException:
+                logger.exception('Не удалось сбросить кэш %s', url)
+
+
+@lru_cache(maxsize=None)
+def get_purger():
+    """Метод получения пургера, выбранного в EDGE_PURGER."""
+    return import_string(settings.EDGE_PURGER)()
+
+
+def purge(*keys):
+    """Метод сброса ответов по ключам после фиксации транзакции."""
+    transaction.on_commit(lambda: get_purger().purge(keys))
+
+
+class SurrogateKeyMiddleware(MiddlewareMixin):
+    """Разметка ответов для кэша nginx.
+
+    Анонимные GET-ответы RESPONSE_CACHE_PATHS получают X-Accel-Expires
+    со сроком EDGE_CACHE_TTL и Surrogate-Key с ключами для сброса.
+    Остальные ответы nginx не кэширует, как и ответы с параметрами
+    Accept и просмотры рецептов:
+    попадания в кэш nginx не доходят до счетчика просмотров. Стоит перед
+    ResponseCacheMiddleware, чтобы размечать и ответы из его кэша.
+    """
+
+    def process_response(self, request, response):
+        if (not settings.EDGE_CACHE_TTL
+                or request.method not in ('GET', 'HEAD')
+                or 'HTTP_AUTHORIZATION' in request.META
+                or response.status_code != 200
+                or not is_default_rendering(response)
+                or response.cookies
+                or not request.path.startswith(
+                    settings.RESPONSE_CACHE_PATHS)
+                or viewed_recipe_id(request) is not None):
+            return response
+        keys = surrogate_keys(request.path_info)
+        if keys:
+            response.headers['Surrogate-Key'] = ' '.join(keys)
+        response.headers['X-Accel-Expires'] = str(settings.EDGE_CACHE_TTL)
+        return response
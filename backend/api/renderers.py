@@ -0,0 +1,25 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson.
+
+    Типы, которые orjson не знает (Decimal, ленивые строки перевода),
+    и даты преобразуются энкодером DRF, чтобы вывод совпадал
+    с JSONRenderer. Запросы с отступами в Accept обрабатывает
+    стандартный рендерер.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data, default=self.encoder.default,
+            option=(orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME))
@@ -1,17 +1,24 @@
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from recipes.models import (
     Ingredient, IngredientAmount, Recipe, Tag, TagRecipe,
 )
+from .authentication import STATELESS_USER_FIELDS
+from .documents import refresh_document
 from .mixins import (
     CommonSubscribedMixin, CommonRecipeMixin, CommonCountMixin,
+    SparseFieldsMixin,
 )
+from .shopping_list import change_recipe, recipe_amounts
 from users.models import User
 
 
-class RegistrationSerializer(UserCreateSerializer, CommonSubscribedMixin):
+class RegistrationSerializer(SparseFieldsMixin, UserCreateSerializer,
+                             CommonSubscribedMixin):
     """Создание сериализатора модели пользователя."""
     class Meta:
         """Мета параметры сериализатора модели пользователя."""
@@ -28,6 +35,18 @@ class RegistrationSerializer(UserCreateSerializer, CommonSubscribedMixin):
         return result
 
 
+class StatelessTokenObtainSerializer(TokenObtainPairSerializer):
+    """Выпуск JWT с полями профиля для аутентификации без базы."""
+
+    @classmethod
+    def get_token(cls, user):
+        """Метод добавления полей профиля в токен."""
+        token = super().get_token(user)
+        for field in STATELESS_USER_FIELDS:
+            token[field] = getattr(user, field)
+        return token
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     """Создание сериализатора модели продуктов."""
 
@@ -171,23 +190,29 @@ class RecipeSerializerPost(serializers.ModelSerializer,
         IngredientAmount.objects.bulk_create(ingredient_list)
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         """Метод создания рецептов."""
         tags_data = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredientamount')
         recipe = Recipe.objects.create(**validated_data)
         self.__add_tags_and_ingredients(tags_data, ingredients, recipe)
+        refresh_document(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Метод редактирования ингредиентов."""
         tags_data = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredientamount')
+        old_amounts = recipe_amounts(instance.id)
         TagRecipe.objects.filter(recipe=instance).delete()
         IngredientAmount.objects.filter(recipe=instance).delete()
         instance = self.__add_tags_and_ingredients(
             tags_data, ingredients, instance)
         super().update(instance, validated_data)
+        change_recipe(instance.id, old_amounts, recipe_amounts(instance.id))
+        refresh_document(instance)
         return instance
 
 
@@ -198,10 +223,11 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'cooking_time', 'image')
 
 
-class SubscriptionSerializer(serializers.ModelSerializer,
+class SubscriptionSerializer(SparseFieldsMixin, serializers.ModelSerializer,
                              CommonSubscribedMixin, CommonCountMixin):
     """Сериализатор для списка подписок."""
     recipes = serializers.SerializerMethodField()
+    expandable_fields = ('recipes',)
 
     class Meta:
         """Мета параметры сериализатора списка подписок."""
@@ -212,8 +238,14 @@ class SubscriptionSerializer(serializers.ModelSerializer,
     def get_recipes(self, obj):
         """Метод получения данных рецептов автора."""
         request = self.context.get('request')
-        queryset = Recipe.objects.filter(author__id=obj.id).order_by('id')
-        if request.GET.get('recipes_limit'):
-            recipes_limit = int(request.GET.get('recipes_limit'))
-            queryset = queryset[:recipes_limit]
+        if hasattr(obj, 'subscription_recipes'):
+            queryset = obj.subscription_recipes
+        else:
+            queryset = Recipe.objects.filter(
+                author__id=obj.id).order_by('id')
+            if request.GET.get('recipes_limit'):
+                recipes_limit = int(request.GET.get('recipes_limit'))
+                queryset = queryset[:recipes_limit]
+        if 'recipes' not in self.expand:
+            return [recipe.id for recipe in queryset]
         return ShortRecipeSerializer(queryset, many=True).data
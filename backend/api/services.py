@@ -1,11 +1,16 @@
 from django.http import HttpResponse
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 
 
 def create_shoping_list(final_list):
-    """Метод создания листа PDF."""
+    """Метод создания листа PDF.
+
+    reportlab вместе с Pillow импортируется при первом вызове, а не при
+    загрузке модуля: PDF строит малая доля запросов.
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
     X_COORD = 250
     Y_COORD = 800
 
@@ -25,7 +30,7 @@ def create_shoping_list(final_list):
             width,
             height,
             f'{number}.  {item["ingredient__name"]} - '
-            f'{item["ingredient_total"]}'
+            f'{item["amount"]}'
             f'{item["ingredient__measurement_unit"]}'
         )
         height -= 30
@@ -0,0 +1,105 @@
+from django.db.models import (
+    Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import IngredientAmount, ShoppingCart, ShoppingListItem
+from users.models import User
+
+
+def get_shopping_list(user):
+    """Метод выборки итогов списка покупок одним запросом по индексу.
+
+    Продукты скрытых рецептов, которые еще лежат в корзине до очистки
+    командой purge_deleted, вычитаются из итогов подзапросом.
+    """
+    hidden = IngredientAmount.objects.filter(
+        ingredient_id=OuterRef('ingredient_id'),
+        recipe__deleted_at__isnull=False,
+        recipe__shoppingcarts__user_id=OuterRef('user_id'),
+    ).order_by().values('ingredient_id').annotate(
+        hidden=Sum('amount')).values('hidden')
+    return ShoppingListItem.objects.filter(user=user).annotate(
+        amount=F('total') - Coalesce(Subquery(hidden), 0),
+    ).filter(amount__gt=0).values(
+        'ingredient_id', 'ingredient__name', 'ingredient__measurement_unit',
+        'amount').order_by('ingredient__name')
+
+
+def serialize_shopping_list(rows):
+    """Метод приведения итогов к виду ингредиента рецепта в API."""
+    return [
+        {
+            'id': row['ingredient_id'],
+            'name': row['ingredient__name'],
+            'measurement_unit': row['ingredient__measurement_unit'],
+            'amount': row['amount'],
+        }
+        for row in rows
+    ]
+
+
+def recipe_amounts(recipe_id):
+    """Метод получения количеств продуктов рецепта."""
+    return dict(IngredientAmount.objects.filter(
+        recipe_id=recipe_id).values_list('ingredient_id', 'amount'))
+
+
+def apply_deltas(user_ids, deltas):
+    """Метод изменения итогов списков покупок пользователей.
+
+    deltas - изменение количества по id продукта. Строки пользователей
+    блокируются по порядку id, поэтому параллельные изменения одного
+    списка выполняются по очереди и не создают дубликатов итогов.
+    Вызывается внутри транзакции изменения корзины или рецепта.
+    """
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not deltas:
+        return
+    user_ids = list(User.objects.select_for_update().filter(
+        id__in=user_ids).order_by('id').values_list('id', flat=True))
+    if not user_ids:
+        return
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas)
+    existing = set(items.values_list('user_id', 'ingredient_id'))
+    items.update(total=Greatest(F('total') + Case(
+        *(When(ingredient_id=ingredient_id, then=Value(delta))
+          for ingredient_id, delta in deltas.items()),
+        output_field=IntegerField()), 0))
+    ShoppingListItem.objects.bulk_create([
+        ShoppingListItem(
+            user_id=user_id, ingredient_id=ingredient_id, total=delta)
+        for user_id in user_ids
+        for ingredient_id, delta in deltas.items()
+        if delta > 0 and (user_id, ingredient_id) not in existing
+    ])
+    items.filter(total=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    """Метод добавления продуктов рецепта в список покупок."""
+    apply_deltas([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    """Метод вычитания продуктов рецепта из списка покупок."""
+    apply_deltas([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()
+    })
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Метод переноса изменений состава рецепта во все корзины с ним."""
+    apply_deltas(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_id).values_list('user_id', flat=True),
+        {
+            ingredient_id: (new_amounts.get(ingredient_id, 0)
+                            - old_amounts.get(ingredient_id, 0))
+            for ingredient_id in {*old_amounts, *new_amounts}
+        })
@@ -0,0 +1,105 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram.compression import invalidate_response_cache
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from users.models import User
+from .authentication import invalidate_tokens
+from .catalog import invalidate_tags
+from .documents import (
+    DOCUMENT_AUTHOR_FIELDS, referencing_recipe_ids, refresh_documents,
+)
+from .purge import purge
+from .shopping_list import add_recipe, remove_recipe
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Сброс кэша при удалении токена, в том числе при выходе."""
+    invalidate_tokens(instance.key)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    """Сброс кэша токена, с которым выполнен выход."""
+    token = getattr(request, 'auth', None)
+    if isinstance(token, Token):
+        invalidate_tokens(token.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Сброс кэша токенов при изменении или блокировке пользователя."""
+    if not created:
+        invalidate_tokens(*Token.objects.filter(
+            user=instance).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    """Пересборка документов рецептов при изменении данных автора."""
+    if created or (update_fields is not None
+                   and not set(update_fields) & set(DOCUMENT_AUTHOR_FIELDS)):
+        return
+    refresh_documents(Recipe.objects.filter(
+        author=instance).values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def reference_deleting(sender, instance, **kwargs):
+    """Запоминание рецептов до каскадного удаления связей."""
+    instance.document_recipe_ids = referencing_recipe_ids(instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def reference_changed(sender, instance, created=False, **kwargs):
+    """Пересборка документов рецептов с измененным тегом или продуктом."""
+    if created:
+        return
+    recipe_ids = getattr(instance, 'document_recipe_ids', None)
+    if recipe_ids is None:
+        recipe_ids = referencing_recipe_ids(instance)
+    refresh_documents(recipe_ids)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_item_added(sender, instance, created, **kwargs):
+    """Добавление продуктов рецепта в итоги списка покупок."""
+    if created:
+        add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def cart_item_deleting(sender, instance, **kwargs):
+    """Вычитание продуктов рецепта из итогов списка покупок.
+
+    Обрабатывается pre_delete: при каскадном удалении рецепта его
+    ингредиенты к этому моменту еще не удалены.
+    """
+    remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    """Сброс кэшей ответов с измененным рецептом."""
+    invalidate_response_cache()
+    purge('recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def catalog_changed(sender, **kwargs):
+    """Сброс кэшей ответов при изменении справочников."""
+    invalidate_response_cache()
+    if sender is Tag:
+        invalidate_tags()
+    purge('tags' if sender is Tag else 'ingredients', 'catalog')
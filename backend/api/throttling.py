@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+WINDOW_KEY = 'throttle:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """Метод разбора частоты '10/min' в число запросов и период в секундах."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+def count_request(cache, key, timeout):
+    """Метод атомарного увеличения счетчика окна."""
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Окно истекло между add и incr.
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def take_token(scope, ident):
+    """Метод учета запроса клиента ident в лимите scope.
+
+    Возвращает 0, если запрос пропущен, иначе - сколько секунд ждать.
+    Запросы считаются скользящим окном: счетчики окон длиной в период
+    хранятся в кэше THROTTLE_CACHE и меняются атомарными add/incr, а
+    число запросов за последний период оценивается по текущему окну и
+    доле предыдущего. Границы окон берутся по time.time(), поэтому
+    общий кэш дает один лимит на все воркеры и хосты.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+    if rate is None:
+        return 0
+    limit, period = parse_rate(rate)
+    cache = caches[settings.THROTTLE_CACHE]
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+    key = WINDOW_KEY.format(scope, ident, window)
+    count = count_request(cache, key, period * 2)
+    previous = cache.get(WINDOW_KEY.format(scope, ident, window - 1), 0)
+    weight = 1 - elapsed / period
+    excess = previous * weight + count - limit
+    if excess <= 0:
+        return 0
+    # Отклоненный запрос не занимает место в лимите.
+    cache.decr(key)
+    if previous and excess <= previous * weight:
+        return excess * period / previous
+    return period - elapsed
+
+
+def get_ident(request, user):
+    """Метод выбора ключа лимита: пользователь или IP анонима."""
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Ограничение частоты запросов скользящим окном.
+
+    Лимит выбирается по атрибуту throttle_scope представления, частота
+    берется из DEFAULT_THROTTLE_RATES. Представления без throttle_scope
+    не ограничиваются.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        self.wait_time = take_token(scope, get_ident(request, request.user))
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class ConcurrencyLimiter:
+    """Ограничение числа одновременных тяжелых операций в процессе.
+
+    Если свободных слотов нет, запрос сразу получает 429 с Retry-After,
+    а не ждет в очереди, занимая поток.
+    """
+
+    def __init__(self, limit, retry_after):
+        self.slots = threading.BoundedSemaphore(limit)
+        self.retry_after = retry_after
+
+    def __enter__(self):
+        if not self.slots.acquire(blocking=False):
+            raise Throttled(wait=self.retry_after)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.slots.release()
+
+
+pdf_limiter = ConcurrencyLimiter(
+    settings.PDF_MAX_CONCURRENCY, settings.PDF_RETRY_AFTER)
@@ -0,0 +1,107 @@
+from django.db import connection
+
+# Переключатели избранного, корзины и подписки выполняются одним
+# запросом: повторное нажатие не создает дубликатов и не падает на
+# уникальном ограничении, а ответ 201/400/404 определяется по его
+# результату без предварительных проверок.
+
+
+def get_tables(model, target_field):
+    """Метод получения имен таблиц и столбцов связи и ее объекта."""
+    quote = connection.ops.quote_name
+    target_model = model._meta.get_field(target_field).related_model
+    return {
+        'table': quote(model._meta.db_table),
+        'user': quote(model._meta.get_field('user').column),
+        'target': quote(model._meta.get_field(target_field).column),
+        'target_table': quote(target_model._meta.db_table),
+        'target_pk': quote(target_model._meta.pk.column),
+        'target_model': target_model,
+    }
+
+
+def get_defaults(model, target_field):
+    """Метод получения значений по умолчанию прочих полей связи."""
+    return {
+        field.column: field.get_db_prep_save(field.get_default(), connection)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+        and field.name not in ('user', target_field) and field.has_default()
+    }
+
+
+def link(model, target_field, user_id, target_id, columns):
+    """Метод добавления связи пользователя с объектом.
+
+    Возвращает строку объекта со столбцами columns или None, если
+    объекта нет или он удален, и признак добавления связи. На PostgreSQL
+    поиск объекта и вставка выполняются одним запросом.
+    """
+    names = get_tables(model, target_field)
+    target_model = names['target_model']
+    defaults = get_defaults(model, target_field)
+    quote = connection.ops.quote_name
+    insert_columns = ', '.join(
+        [names['user'], names['target'], *map(quote, defaults)])
+    placeholders = ''.join(', %s' for _ in defaults)
+    selected = ', '.join(
+        quote(target_model._meta.get_field(name).column) for name in columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'WITH target AS ('
+                f'SELECT {selected} FROM {names["target_table"]} '
+                f'WHERE {names["target_pk"]} = %s AND deleted_at IS NULL'
+                f'), inserted AS ('
+                f'INSERT INTO {names["table"]} ({insert_columns}) '
+                f'SELECT %s, {names["target_pk"]}{placeholders} FROM target '
+                f'ON CONFLICT DO NOTHING RETURNING 1'
+                f') SELECT *, EXISTS (SELECT 1 FROM inserted) FROM target',
+                [target_id, user_id, *defaults.values()])
+            row = cursor.fetchone()
+            if row is None:
+                return None, False
+            return row[:-1], row[-1]
+        cursor.execute(
+            f'SELECT {selected} FROM {names["target_table"]} '
+            f'WHERE {names["target_pk"]} = %s AND deleted_at IS NULL',
+            [target_id])
+        row = cursor.fetchone()
+        if row is None:
+            return None, False
+        cursor.execute(
+            f'INSERT INTO {names["table"]} ({insert_columns}) '
+            f'VALUES (%s, %s{placeholders}) ON CONFLICT DO NOTHING',
+            [user_id, target_id, *defaults.values()])
+        return row, cursor.rowcount == 1
+
+
+def unlink(model, target_field, user_id, target_id):
+    """Метод удаления связи пользователя с объектом.
+
+    Возвращает True, если связь удалена, False, если ее не было, и None,
+    если нет и связи, и объекта. На PostgreSQL удаление и проверка
+    объекта выполняются одним запросом.
+    """
+    names = get_tables(model, target_field)
+    delete = (f'DELETE FROM {names["table"]} '
+              f'WHERE {names["user"]} = %s AND {names["target"]} = %s')
+    exists = (f'EXISTS (SELECT 1 FROM {names["target_table"]} '
+              f'WHERE {names["target_pk"]} = %s AND deleted_at IS NULL)')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'WITH deleted AS ({delete} RETURNING 1) '
+                f'SELECT EXISTS (SELECT 1 FROM deleted), {exists}',
+                [user_id, target_id, target_id])
+            deleted, found = cursor.fetchone()
+        else:
+            cursor.execute(delete, [user_id, target_id])
+            deleted = cursor.rowcount == 1
+            found = deleted
+            if not deleted:
+                cursor.execute(f'SELECT {exists}', [target_id])
+                found = cursor.fetchone()[0]
+    if deleted:
+        return True
+    return False if found else None
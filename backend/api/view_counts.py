@@ -0,0 +1,125 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Case, DateTimeField, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+from recipes.models import RecipeStats
+
+logger = logging.getLogger(__name__)
+
+VIEW_ROUTE = 'recipes-detail'
+VIEW_PATH_PREFIX = '/api/recipes/'
+
+
+class ViewCounter:
+    """Буфер просмотров рецептов процесса.
+
+    Просмотр только увеличивает счетчик в памяти. Фоновый поток раз в
+    VIEW_COUNTS_FLUSH_SECONDS записывает накопленное одним UPDATE, при
+    остановке процесса буфер сбрасывается через atexit. При аварийном
+    завершении теряются просмотры не больше чем за один интервал.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.last_viewed = {}
+        self.thread = None
+
+    def add(self, recipe_id):
+        """Метод учета просмотра рецепта без обращения к базе."""
+        with self.lock:
+            self.counts[recipe_id] += 1
+            self.last_viewed[recipe_id] = timezone.now()
+            if self.thread is None:
+                # Поток запускается в воркере, а не в мастере gunicorn:
+                # потоки не переживают fork.
+                self.thread = threading.Thread(
+                    target=self.run, name='view-counts', daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+
+    def run(self):
+        """Метод фонового сброса буфера раз в интервал."""
+        event = threading.Event()
+        while not event.wait(settings.VIEW_COUNTS_FLUSH_SECONDS):
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Не удалось записать просмотры рецептов')
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Метод записи накопленных просмотров одним UPDATE.
+
+        При ошибке базы просмотры возвращаются в буфер и пишутся
+        следующим сбросом.
+        """
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            last_viewed, self.last_viewed = self.last_viewed, {}
+        if not counts:
+            return
+        viewed = Case(
+            *(When(recipe_id=recipe_id, then=Value(moment))
+              for recipe_id, moment in last_viewed.items()),
+            output_field=DateTimeField())
+        try:
+            RecipeStats.objects.filter(recipe_id__in=counts).update(
+                views=F('views') + Case(
+                    *(When(recipe_id=recipe_id, then=Value(count))
+                      for recipe_id, count in counts.items()),
+                    output_field=IntegerField()),
+                last_viewed=Greatest(Coalesce('last_viewed', viewed), viewed))
+        except DatabaseError:
+            with self.lock:
+                self.counts.update(counts)
+                for recipe_id, moment in last_viewed.items():
+                    self.last_viewed.setdefault(recipe_id, moment)
+            raise
+
+
+view_counter = ViewCounter()
+
+
+def viewed_recipe_id(request):
+    """Метод получения id рецепта, если запрос - просмотр рецепта.
+
+    Маршрут разрешается заново: ответ из кэша возвращается до того,
+    как Django найдет представление.
+    """
+    if not hasattr(request, 'viewed_recipe_id'):
+        request.viewed_recipe_id = None
+        if request.path_info.startswith(VIEW_PATH_PREFIX):
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                match = None
+            if match is not None and match.url_name == VIEW_ROUTE:
+                request.viewed_recipe_id = int(match.kwargs['pk'])
+    return request.viewed_recipe_id
+
+
+class ViewCountMiddleware(MiddlewareMixin):
+    """Учет просмотров рецептов.
+
+    Стоит перед ResponseCacheMiddleware, поэтому учитываются и ответы
+    из его кэша. Кэш nginx такие ответы не хранит, см.
+    SurrogateKeyMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if request.method == 'GET' and response.status_code == 200:
+            recipe_id = viewed_recipe_id(request)
+            if recipe_id is not None:
+                view_counter.add(recipe_id)
+        return response
@@ -1,85 +1,264 @@
 from http import HTTPStatus
 
-from django.db.models import Sum
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import permissions, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from foodgram.compression import invalidate_response_cache
+from foodgram.db.pool import pool_stats
+from .catalog import get_tags
+from .fieldsets import parse_fieldset
+from .lean import (
+    RECIPE_EXPANDABLE, RECIPE_FIELDS, recipe_columns, serialize_recipes,
+)
+from .deletion import soft_delete_recipe, soft_delete_user
+from .feed import drop_timeline, get_feed_page_queryset, push_to_timelines
+from .matching import get_index, index_recipe
 from .services import create_shoping_list
+from .shopping_list import (
+    add_recipe, get_shopping_list, remove_recipe, serialize_shopping_list,
+)
+from .throttling import pdf_limiter
+from .toggles import link, unlink
 from users.models import User, Subscription
 from recipes.models import (
-    Favorite, Ingredient, IngredientAmount, Recipe,
-    ShoppingCart, Tag,
+    Favorite, Ingredient, Recipe, RecipeStats, ShoppingCart, Tag,
 )
-from .mixins import BaseFavoriteCartViewSetMixin
+from .mixins import BaseFavoriteCartViewSetMixin, SparseFieldsViewMixin
 from .filters import RecipeFilter, SearchIngredientFilter
+from .pagination import FeedPagination
+from .purge import purge
 from .serializers import (
     FavoriteSerializer, IngredientSerializer, RecipeSerializer,
     RecipeSerializerPost, RegistrationSerializer, ShoppingCartSerializer,
-    SubscriptionSerializer, TagSerializer,
+    ShortRecipeSerializer, SubscriptionSerializer, TagSerializer,
 )
-from .permissions import IsAuthorOrReadOnly
+from .permissions import IsAuthor, IsAuthorOrReadOnly
 
 
-class CreateUserView(UserViewSet):
+class CreateUserView(SparseFieldsViewMixin, UserViewSet):
     """Создание нового пользователя в системе."""
     serializer_class = RegistrationSerializer
 
     def get_queryset(self):
-        return User.objects.all()
+        return User.objects.filter(deleted_at__isnull=True)
 
+    def perform_destroy(self, instance):
+        soft_delete_user(instance)
 
-class SubscribeViewSet(viewsets.ModelViewSet):
+
+class SubscribeViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """ Подписки на авторов."""
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    author_fields = ('email', 'id', 'username', 'first_name', 'last_name')
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
+        """Метод выборки авторов с рецептами и их числом.
 
+        Счетчик и рецепты не загружаются, если ?fields= их не включает.
+        """
+        fields = None
+        if self.request.method == 'GET':
+            fields, _ = parse_fieldset(
+                self.request, self.serializer_class.readable_fields(),
+                self.serializer_class.expandable_fields)
+        queryset = User.objects.filter(
+            following__user=self.request.user, deleted_at__isnull=True)
+        if fields is None or 'recipes_count' in fields:
+            queryset = queryset.annotate(recipes_count=Count(
+                'recipes', filter=Q(recipes__deleted_at__isnull=True)))
+        if fields is None or 'recipes' in fields:
+            recipes = Recipe.objects.only(
+                'id', 'author_id', 'name', 'cooking_time', 'image'
+            ).order_by('id')
+            if self.request.GET.get('recipes_limit'):
+                recipes = recipes[:int(self.request.GET.get('recipes_limit'))]
+            queryset = queryset.prefetch_related(Prefetch(
+                'recipes', queryset=recipes, to_attr='subscription_recipes'))
+        return queryset
+
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
-        """ Метод создания подписки."""
-        user_id = self.kwargs.get('users_id')
-        user = get_object_or_404(User, id=user_id)
-        Subscription.objects.create(
-            user=request.user, following=user)
-        return Response(HTTPStatus.CREATED)
+        """ Метод создания подписки.
+
+        Подписка на себя и повторная подписка возвращают 400.
+        """
+        author_id = self.kwargs['users_id']
+        if author_id == request.user.id:
+            return Response(
+                {'errors': 'Нельзя подписаться на самого себя.'},
+                status=HTTPStatus.BAD_REQUEST)
+        row, created = link(
+            Subscription, 'following', request.user.id, author_id,
+            self.author_fields)
+        if row is None:
+            raise Http404
+        if not created:
+            return Response({'errors': 'Вы уже подписаны на автора.'},
+                            status=HTTPStatus.BAD_REQUEST)
+        drop_timeline(request.user)
+        serializer = self.get_serializer(
+            User(**dict(zip(self.author_fields, row))))
+        return Response(serializer.data, status=HTTPStatus.CREATED)
 
     def delete(self, request, *args, **kwargs):
-        """ Метод удаления подписки."""
+        """ Метод удаления подписки.
+
+        Удаление отсутствующей подписки возвращает 400.
+        """
         author_id = self.kwargs['users_id']
-        user_id = request.user.id
-        subscribe = get_object_or_404(
-            Subscription, user__id=user_id, following__id=author_id)
-        subscribe.delete()
-        return Response(HTTPStatus.NO_CONTENT)
+        deleted = unlink(
+            Subscription, 'following', request.user.id, author_id)
+        if deleted is None:
+            raise Http404
+        if not deleted:
+            return Response({'errors': 'Вы не подписаны на автора.'},
+                            status=HTTPStatus.BAD_REQUEST)
+        drop_timeline(request.user)
+        return Response(status=HTTPStatus.NO_CONTENT)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """ Создание рецептов."""
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
-    filter_class = RecipeFilter
+    filterset_class = RecipeFilter
     filter_backends = [DjangoFilterBackend, ]
+    throttle_scope = None
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        RecipeStats.objects.create(recipe=recipe)
+        push_to_timelines(recipe)
+        index_recipe(recipe)
+        # Сигнал post_save приходит до записи тегов и ингредиентов.
+        invalidate_response_cache()
+        purge('recipes')
+
+    def perform_update(self, serializer):
+        index_recipe(serializer.save())
+
+    def perform_destroy(self, instance):
+        soft_delete_recipe(instance)
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
         return RecipeSerializerPost
 
-    @action(detail=False, methods=['get'],)
+    def get_throttles(self):
+        if self.action in ('create', 'update', 'partial_update'):
+            self.throttle_scope = 'recipe_write'
+        return super().get_throttles()
+
+    def get_fieldset(self):
+        """Метод разбора параметров ?fields= и ?expand= рецептов."""
+        return parse_fieldset(
+            self.request, RECIPE_FIELDS, RECIPE_EXPANDABLE)
+
+    def list(self, request, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        queryset = self.filter_queryset(self.get_queryset()).only(
+            *recipe_columns(fields))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            serialize_recipes(page, request, fields, expand))
+
+    def retrieve(self, request, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        recipe = self.get_object()
+        return Response(serialize_recipes(
+            [recipe], request, fields, expand)[0])
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated],
+            pagination_class=FeedPagination)
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        first_page = not request.query_params.get(
+            self.paginator.cursor_query_param)
+        fields, expand = self.get_fieldset()
+        queryset = get_feed_page_queryset(
+            request.user, self.paginator.get_page_size(request), first_page)
+        page = self.paginate_queryset(
+            queryset.only(*recipe_columns(fields)))
+        return self.get_paginated_response(
+            serialize_recipes(page, request, fields, expand))
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.AllowAny])
+    def cook(self, request):
+        """Рецепты, отсортированные по покрытию набора продуктов."""
+        ingredient_ids = []
+        for value in request.query_params.getlist('ingredients'):
+            for ingredient_id in value.split(','):
+                if not ingredient_id.strip().isdigit():
+                    raise ValidationError(
+                        {'ingredients': 'Укажите id продуктов через запятую'})
+                ingredient_ids.append(int(ingredient_id))
+        fields, expand = self.get_fieldset()
+        page = self.paginate_queryset(get_index().match(ingredient_ids))
+        recipes = Recipe.objects.only(*recipe_columns(fields)).in_bulk(
+            [recipe_id for recipe_id, _, _ in page])
+        coverages = {recipe_id: coverage for recipe_id, coverage, _ in page}
+        found = [recipes[recipe_id] for recipe_id, _, _ in page
+                 if recipe_id in recipes]
+        results = serialize_recipes(found, request, fields, expand)
+        for recipe, data in zip(found, results):
+            data['coverage'] = round(coverages[recipe.id], 3)
+        return self.get_paginated_response(results)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthor])
+    def stats(self, request, pk=None):
+        """Статистика рецепта для автора.
+
+        Просмотры записываются из буферов воркеров с задержкой до
+        VIEW_COUNTS_FLUSH_SECONDS.
+        """
+        recipe = self.get_object()
+        stats = RecipeStats.objects.filter(recipe=recipe).values(
+            'views', 'last_viewed', 'popularity', 'trending').first() or {
+                'views': 0, 'last_viewed': None, 'popularity': 0,
+                'trending': 0}
+        return Response({
+            'id': recipe.id,
+            **stats,
+            'favorites': Favorite.objects.filter(recipe=recipe).count(),
+            'shopping_carts': ShoppingCart.objects.filter(
+                recipe=recipe).count(),
+        })
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def similar(self, request, pk=None):
+        """Предрасчитанные похожие рецепты."""
+        recipes = Recipe.objects.filter(
+            similar_to__recipe_id=pk).order_by('-similar_to__score')
+        serializer = ShortRecipeSerializer(
+            recipes, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], throttle_scope='pdf',
+            permission_classes=[permissions.IsAuthenticated],
+            url_path='download_shopping_cart')
     def download_shoping_cart(self, request):
-        final_list = IngredientAmount.objects.filter(
-            recipe__shoppingcarts__user=request.user).values(
-            'ingredient__name', 'ingredient__measurement_unit').order_by(
-                'ingredient__name').annotate(ingredient_total=Sum('amount'))
-        return create_shoping_list(final_list)
+        final_list = get_shopping_list(request.user)
+        with pdf_limiter:
+            return create_shoping_list(final_list)
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated])
+    def shopping_list(self, request):
+        """Текущий список покупок по рецептам в корзине."""
+        return Response(serialize_shopping_list(
+            get_shopping_list(request.user)))
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -88,6 +267,9 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(get_tags())
+
 
 class IngredientViewSet(viewsets.ModelViewSet):
     """Список ингридиетов."""
@@ -97,6 +279,12 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend, SearchIngredientFilter)
     pagination_class = None
     search_fields = ['^name', ]
+    throttle_scope = 'ingredient_search'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            list(queryset.values('id', 'name', 'measurement_unit')))
 
 
 class FavoriteViewSet(BaseFavoriteCartViewSetMixin):
@@ -111,3 +299,17 @@ class ShoppingCartViewSet(BaseFavoriteCartViewSetMixin):
     serializer_class = ShoppingCartSerializer
     queryset = ShoppingCart.objects.all()
     model = ShoppingCart
+
+    def linked(self, user_id, recipe_id):
+        add_recipe(user_id, recipe_id)
+
+    def unlinked(self, user_id, recipe_id):
+        remove_recipe(user_id, recipe_id)
+
+
+class MetricsView(APIView):
+    """Метрики процесса для администраторов."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'db_pools': pool_stats()})
@@ -0,0 +1,36 @@
+import logging
+
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+from foodgram.db.pool import close_pools
+
+from .catalog import get_tags
+from .matching import get_index
+from .purge import get_purger
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Метод прогрева процесса перед обработкой запросов.
+
+    Загружает маршруты вместе с представлениями, справочник тегов,
+    индекс продуктов для подбора рецептов и пургер кэша. При
+    предзагрузке приложения в gunicorn вызывается в мастере до fork, и
+    воркеры получают прогретое состояние через copy-on-write. Открытые
+    при прогреве соединения с базой закрываются вместе со свободными
+    соединениями пула, куда их возвращает close_all, чтобы воркеры не
+    делили сокеты мастера. Ошибка базы, например до первой миграции, не
+    мешает запуску: кэши заполнятся первыми запросами.
+    """
+    get_resolver().url_patterns
+    get_purger()
+    try:
+        get_tags()
+        get_index()
+    except DatabaseError:
+        logger.warning('Прогрев без данных базы', exc_info=True)
+    finally:
+        connections.close_all()
+        close_pools()
@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.settings import api_settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml', 'text/',
+)
+CACHED_HEADERS = ('Content-Type', 'Content-Encoding', 'Vary', 'ETag')
+VERSION_KEY = 'response:version'
+RESPONSE_KEY = 'response:{}:{}:{}'
+
+
+def accepted_encodings(request):
+    """Метод разбора заголовка Accept-Encoding в словарь с весами."""
+    encodings = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate(request):
+    """Метод выбора кодирования ответа: br при наличии brotli, затем gzip."""
+    accepted = accepted_encodings(request)
+    for encoding in ('br', 'gzip') if brotli else ('gzip',):
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def is_default_rendering(response):
+    """Метод проверки, что ответ отрисован основным рендерером API.
+
+    Ответы с параметрами Accept, например indent, и HTML-ответы не
+    кэшируются: иначе их тело получили бы все клиенты с тем же путем.
+    """
+    return getattr(response, 'accepted_media_type', None) == (
+        api_settings.DEFAULT_RENDERER_CLASSES[0].media_type)
+
+
+def compress(body, encoding):
+    """Метод сжатия тела ответа целиком."""
+    if encoding == 'br':
+        return brotli.compress(
+            body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(
+        body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Потоковое сжатие: каждый фрагмент сбрасывается клиенту сразу."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(
+                quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(
+                settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED,
+                16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return (self.compressor.process(chunk)
+                    + self.compressor.flush())
+        return (self.compressor.compress(chunk)
+                + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_sequence(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов API gzip или brotli.
+
+    Сжимаются текстовые ответы от COMPRESSION_MIN_SIZE байт и потоковые
+    ответы. Пути COMPRESSION_EXCLUDE_PATHS, где в ответе есть секреты,
+    не сжимаются из-за атаки BREACH.
+    """
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_TYPES)
+                or request.path.startswith(
+                    settings.COMPRESSION_EXCLUDE_PATHS)):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(
+                    response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def invalidate_response_cache():
+    """Метод сброса всех закэшированных ответов сменой версии."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+class ResponseCacheMiddleware(MiddlewareMixin):
+    """Кэш анонимных GET-ответов RESPONSE_CACHE_PATHS.
+
+    Стоит перед CompressionMiddleware, поэтому тело хранится уже
+    сжатым - отдельно для каждого кодирования - и сжимается один раз
+    за RESPONSE_CACHE_TTL. Ключ учитывает заголовок Accept, а хранятся
+    только ответы основного рендерера.
+    """
+
+    def process_request(self, request):
+        if (not settings.RESPONSE_CACHE_TTL
+                or request.method != 'GET'
+                or 'HTTP_AUTHORIZATION' in request.META
+                or not request.path.startswith(
+                    settings.RESPONSE_CACHE_PATHS)):
+            return None
+        request.response_cache_key = RESPONSE_KEY.format(
+            cache.get_or_set(VERSION_KEY, 1, None),
+            negotiate(request) or 'identity',
+            hashlib.md5('{}|{}'.format(
+                request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+            ).encode()).hexdigest())
+        cached = cache.get(request.response_cache_key)
+        if cached is None:
+            return None
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers.items():
+            response.headers[header] = value
+        response.headers['Content-Length'] = str(len(content))
+        # В кэше только ответы основного рендерера.
+        response.accepted_media_type = (
+            api_settings.DEFAULT_RENDERER_CLASSES[0].media_type)
+        request.response_cache_key = None
+        return response
+
+    def process_response(self, request, response):
+        key = getattr(request, 'response_cache_key', None)
+        if (key is None or response.status_code != 200
+                or not is_default_rendering(response)
+                or response.streaming or response.cookies
+                or 'private' in response.get('Cache-Control', '')):
+            return response
+        cache.set(key, (response.content, {
+            header: response[header]
+            for header in CACHED_HEADERS if response.has_header(header)
+        }), settings.RESPONSE_CACHE_TTL)
+        return response
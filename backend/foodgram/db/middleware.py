@@ -0,0 +1,86 @@
+import hashlib
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import read_from_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_primary_pin'
+PIN_KEY = 'db:pin:{}'
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет безопасные запросы к API на реплики.
+
+    После успешной записи клиент на DB_STICKY_SECONDS закрепляется за
+    основной базой: по cookie и по хэшу заголовка Authorization, чтобы
+    сразу видеть свои изменения.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DB_REPLICA_ALIASES:
+            return self.get_response(request)
+        token = read_from_replica.set(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DB_REPLICA_ALIASES:
+            return await self.get_response(request)
+        token = read_from_replica.set(
+            await sync_to_async(self.use_replica)(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def use_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and request.path.startswith(settings.DB_REPLICA_PATHS)
+            and not self.is_pinned(request)
+        )
+
+    @staticmethod
+    def pin_key(request):
+        authorization = request.headers.get('Authorization')
+        if not authorization:
+            return None
+        return PIN_KEY.format(
+            hashlib.sha256(authorization.encode()).hexdigest())
+
+    def is_pinned(self, request):
+        if request.COOKIES.get(PIN_COOKIE):
+            return True
+        key = self.pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def pin(self, request, response):
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.DB_STICKY_SECONDS,
+            httponly=True, samesite='Lax')
+        key = self.pin_key(request)
+        if key is not None:
+            cache.set(key, True, settings.DB_STICKY_SECONDS)
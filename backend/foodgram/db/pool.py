@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за отведенное время."""
+
+
+class ConnectionPool:
+    """Пул соединений с базой, общий для потоков процесса.
+
+    Простаивавшее дольше check_interval соединение перед выдачей
+    проверяется запросом SELECT 1.
+    """
+
+    def __init__(self, max_size, timeout, check_interval):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.idle = deque()
+        self.in_use = 0
+        self.condition = threading.Condition()
+        self.created = 0
+        self.discarded = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+
+    def acquire(self, factory):
+        """Метод выдачи соединения; factory создает новое соединение."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        connection = None
+        waited = False
+        with self.condition:
+            while not self.idle and self.in_use >= self.max_size:
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'Нет свободных соединений за {self.timeout} с')
+                self.condition.wait(remaining)
+            if self.idle:
+                connection, released_at = self.idle.pop()
+            self.in_use += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self.waits += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+        try:
+            if connection is not None and (
+                    time.monotonic() - released_at > self.check_interval
+                    and not self.is_usable(connection)):
+                self.discard(connection)
+                connection = None
+            if connection is None:
+                connection = factory()
+                self.created += 1
+        except BaseException:
+            self.release_slot()
+            raise
+        return connection
+
+    def release(self, connection):
+        """Метод возврата соединения в пул."""
+        try:
+            if connection.closed:
+                raise ValueError('Соединение закрыто')
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            self.release_slot()
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.in_use -= 1
+            self.condition.notify()
+
+    def release_slot(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+
+    def discard(self, connection):
+        self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """Метод закрытия свободных соединений пула.
+
+        Выданные соединения не трогаются и вернутся в пул как обычно.
+        """
+        with self.condition:
+            idle = list(self.idle)
+            self.idle.clear()
+        for connection, _ in idle:
+            self.discard(connection)
+
+    @staticmethod
+    def is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def stats(self):
+        """Метод получения статистики пула."""
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'created': self.created,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'wait_time_avg_ms': round(
+                    self.wait_time / self.waits * 1000, 2
+                ) if self.waits else 0,
+                'wait_time_max_ms': round(self.max_wait_time * 1000, 2),
+                'timeouts': self.timeouts,
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """Метод получения пула соединений для алиаса базы."""
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL', {})
+            pools[alias] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                check_interval=options.get('CHECK_INTERVAL', 30),
+            )
+        return pools[alias]
+
+
+def pool_stats():
+    """Метод получения статистики всех пулов процесса."""
+    with pools_lock:
+        return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """Метод закрытия свободных соединений всех пулов процесса."""
+    with pools_lock:
+        current = list(pools.values())
+    for pool in current:
+        pool.close_idle()
+
+
+def reset_pools():
+    """Метод сброса пулов, унаследованных процессом при fork.
+
+    Соединения не закрываются: их сокеты принадлежат родителю, и
+    закрытие в дочернем процессе оборвало бы их сеанс.
+    """
+    global pools_lock
+    pools.clear()
+    pools_lock = threading.Lock()
@@ -0,0 +1,29 @@
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from ..pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений внутри процесса.
+
+    Закрытие соединения Django возвращает его в пул, поэтому
+    CONN_MAX_AGE для этого бэкенда должен быть равен 0.
+    """
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        try:
+            connection = pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params))
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get(
+                'isolation_level', IsolationLevel.READ_COMMITTED))
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            get_pool(self.alias, self.settings_dict).release(self.connection)
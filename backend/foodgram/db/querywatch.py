@@ -0,0 +1,152 @@
+import logging
+import re
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+STACK_DEPTH = 8
+
+
+def fingerprint(sql):
+    """Метод приведения SQL к виду без значений.
+
+    Параметры Django передает отдельно от текста запроса, поэтому
+    схлопываются только списки IN разной длины и литералы вроде LIMIT.
+    """
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    sql = STRING_RE.sub('?', sql)
+    return NUMBER_RE.sub('?', sql)
+
+
+def project_stack():
+    """Метод получения кадров стека из кода проекта."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return traceback.format_list(frames[-STACK_DEPTH:])
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запросов больше бюджета или есть повторы одного запроса."""
+
+
+class QueryWatcher:
+    """Сбор запросов по отпечаткам для execute_wrapper.
+
+    Для каждого отпечатка хранится число выполнений, первый текст
+    запроса и стек кода проекта, который его выполнил.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        key = fingerprint(sql)
+        if key in self.statements:
+            self.statements[key]['count'] += 1
+        else:
+            self.statements[key] = {
+                'count': 1, 'sql': sql, 'stack': project_stack()}
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """Метод выбора запросов, повторенных больше threshold раз."""
+        return [
+            statement for statement in self.statements.values()
+            if statement['count'] > threshold
+        ]
+
+    def problems(self, threshold=None, budget=None):
+        """Метод формирования отчета о повторах и превышении бюджета."""
+        if threshold is None:
+            threshold = settings.QUERY_REPEAT_THRESHOLD
+        lines = []
+        if budget is not None and self.count > budget:
+            lines.append(f'Выполнено запросов: {self.count}, бюджет: {budget}')
+        for statement in self.repeated(threshold):
+            lines.append(
+                f'Запрос выполнен {statement["count"]} раз: '
+                f'{statement["sql"][:300]}')
+            lines.extend(line.rstrip() for line in statement['stack'])
+        return '\n'.join(lines)
+
+    def attach(self):
+        """Метод подключения к соединениям всех баз текущего потока."""
+        for alias in connections:
+            connections[alias].execute_wrappers.append(self)
+
+    def detach(self):
+        """Метод отключения от соединений текущего потока."""
+        for alias in connections:
+            wrappers = connections[alias].execute_wrappers
+            if self in wrappers:
+                wrappers.remove(self)
+
+
+@contextmanager
+def assert_queries(budget=None, threshold=None):
+    """Проверка блока кода на N+1 и бюджет запросов.
+
+    Бросает QueryBudgetExceeded с отчетом и стеками, если запросов
+    больше budget или один запрос повторен больше threshold раз.
+    """
+    watcher = QueryWatcher()
+    watcher.attach()
+    try:
+        yield watcher
+    finally:
+        watcher.detach()
+    report = watcher.problems(threshold, budget)
+    if report:
+        raise QueryBudgetExceeded(report)
+
+
+def get_budget(request):
+    """Метод получения бюджета запросов маршрута из QUERY_BUDGETS.
+
+    Бюджеты заданы для чтения, запись проверяется только на повторы.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None or request.method not in ('GET', 'HEAD'):
+        return None
+    return settings.QUERY_BUDGETS.get(match.url_name)
+
+
+class QueryWatchMiddleware(MiddlewareMixin):
+    """Предупреждения о N+1 и превышении бюджета запросов в DEBUG.
+
+    Запросы считаются от process_request до process_response в том же
+    потоке, где выполняются запросы представления, в том числе
+    асинхронного через sync_to_async.
+    """
+
+    def process_request(self, request):
+        if not settings.QUERY_WATCH:
+            return
+        request.query_watcher = QueryWatcher()
+        request.query_watcher.attach()
+
+    def process_response(self, request, response):
+        watcher = getattr(request, 'query_watcher', None)
+        if watcher is None:
+            return response
+        watcher.detach()
+        report = watcher.problems(budget=get_budget(request))
+        if report:
+            logger.warning('%s %s\n%s', request.method, request.path, report)
+        return response
+
@@ -0,0 +1,25 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaRouter:
+    """Роутер чтения с реплик.
+
+    Реплика выбирается только для запросов, помеченных
+    ReplicaRoutingMiddleware; запись всегда идет в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get() and settings.DB_REPLICA_ALIASES:
+            return random.choice(settings.DB_REPLICA_ALIASES)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,190 @@
+import cProfile
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connections
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+PROFILE_SALT = 'foodgram.profiling'
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def issue_token(user):
+    """Метод выдачи подписанного токена профилирования сотруднику."""
+    return signing.dumps({'user': user.id}, salt=PROFILE_SALT)
+
+
+def token_user_id(token):
+    """Метод проверки токена: id сотрудника или None."""
+    try:
+        data = signing.loads(
+            token, salt=PROFILE_SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    user_id = data.get('user')
+    if not get_user_model().objects.filter(
+            id=user_id, is_staff=True, is_active=True).exists():
+        return None
+    return user_id
+
+
+class SqlLog:
+    """Журнал запросов с длительностью для execute_wrapper."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': repr(params)[:500],
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+    def attach(self):
+        """Метод подключения к соединениям всех баз текущего потока."""
+        for alias in connections:
+            connections[alias].execute_wrappers.append(self)
+
+    def detach(self):
+        """Метод отключения от соединений текущего потока."""
+        for alias in connections:
+            wrappers = connections[alias].execute_wrappers
+            if self in wrappers:
+                wrappers.remove(self)
+
+
+def entry_names():
+    """Метод получения имен сохраненных профилей от старых к новым."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    return sorted(
+        name[:-len('.json')] for name in os.listdir(settings.PROFILE_DIR)
+        if name.endswith('.json'))
+
+
+def entry_path(name, extension):
+    """Метод получения пути файла профиля."""
+    return os.path.join(settings.PROFILE_DIR, f'{name}.{extension}')
+
+
+def read_entry(name):
+    """Метод чтения сведений о запросе и журнала SQL профиля."""
+    with open(entry_path(name, 'json')) as file:
+        return json.load(file)
+
+
+def save_entry(request, response, profiler, sql_log, duration, user_id):
+    """Метод записи профиля в кольцо PROFILE_DIR.
+
+    Профиль cProfile пишется в <имя>.prof, сведения о запросе и журнал
+    SQL - в <имя>.json. Сверх PROFILE_RING_SIZE удаляются самые старые.
+    """
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = SLUG_RE.sub('-', request.path.lower()).strip('-')
+    name = (f'{datetime.now():%Y%m%dT%H%M%S%f}-'
+            f'{request.method.lower()}-{slug}'[:120])
+    profiler.dump_stats(entry_path(name, 'prof'))
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM, None)
+    with open(entry_path(name, 'json'), 'w') as file:
+        json.dump({
+            'method': request.method,
+            'path': request.path + (
+                f'?{query.urlencode()}' if query else ''),
+            'status': response.status_code,
+            'user': user_id,
+            'ms': round(duration * 1000, 3),
+            'queries': sql_log.queries,
+        }, file, ensure_ascii=False, indent=1)
+    for old in entry_names()[:-settings.PROFILE_RING_SIZE]:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(entry_path(old, extension))
+            except FileNotFoundError:
+                pass
+    return name
+
+
+class ProfilingMiddleware:
+    """Профилирование отдельного запроса по подписанному токену.
+
+    Токен из issue_profile_token передается в заголовке X-Profile или
+    параметре ?profile=. Запрос выполняется под cProfile с журналом SQL,
+    результат сохраняется в PROFILE_DIR, а имя профиля возвращается в
+    заголовке X-Profile-Id. Без токена middleware только проверяет его
+    наличие.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def get_token(request):
+        return (request.META.get(PROFILE_HEADER)
+                or request.GET.get(PROFILE_PARAM))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.get_token(request)
+        if not token:
+            return self.get_response(request)
+        user_id = token_user_id(token)
+        if user_id is None:
+            return self.get_response(request)
+        profiler, sql_log = cProfile.Profile(), SqlLog()
+        sql_log.attach()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            sql_log.detach()
+        response.headers['X-Profile-Id'] = save_entry(
+            request, response, profiler, sql_log,
+            time.perf_counter() - start, user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = self.get_token(request)
+        if not token:
+            return await self.get_response(request)
+        user_id = await sync_to_async(token_user_id)(token)
+        if user_id is None:
+            return await self.get_response(request)
+        profiler, sql_log = cProfile.Profile(), SqlLog()
+        # Запросы к базе из sync_to_async идут в отдельном потоке.
+        await sync_to_async(sql_log.attach)()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            await sync_to_async(sql_log.detach)()
+        response.headers['X-Profile-Id'] = await sync_to_async(save_entry)(
+            request, response, profiler, sql_log,
+            time.perf_counter() - start, user_id)
+        return response
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 from dotenv import load_dotenv
 
@@ -31,6 +32,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.profiling.ProfilingMiddleware',
+    'foodgram.db.querywatch.QueryWatchMiddleware',
+    'api.purge.SurrogateKeyMiddleware',
+    'api.view_counts.ViewCountMiddleware',
+    'foodgram.compression.ResponseCacheMiddleware',
+    'foodgram.compression.CompressionMiddleware',
+    'foodgram.db.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +66,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
 
 
 DATABASES = {
@@ -67,10 +76,103 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Для PostgreSQL по умолчанию включен пул процесса: в отличие от
+# CONN_MAX_AGE он переиспользует соединения и при запуске под ASGI.
+if (DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+        and os.getenv('DB_POOL', default='True') == 'True'):
+    DATABASES['default'].update({
+        'ENGINE': 'foodgram.db.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', default=10)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'CHECK_INTERVAL': int(
+                os.getenv('DB_POOL_CHECK_INTERVAL', default=30)),
+        },
+    })
+
+# Реплики для чтения: DB_REPLICAS=host1[:port],host2[:port],
+# для SQLite - пути к файлам баз.
+DB_REPLICA_ALIASES = []
+for index, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES['default']['PORT']
+    DB_REPLICA_ALIASES.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db.routers.ReplicaRouter']
+DB_REPLICA_PATHS = (
+    '/api/recipes/',
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/users/subscriptions/',
+)
+DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', default=5))
+
+# Поиск N+1: повторы одного запроса и бюджеты запросов по имени маршрута.
+QUERY_WATCH = os.getenv('QUERY_WATCH', default=str(DEBUG)) == 'True'
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', default=3))
+QUERY_BUDGETS = {
+    'recipes-list': 9,
+    'recipes-detail': 7,
+    'recipes-feed': 7,
+    'recipes-cook': 7,
+    'recipes-shopping-list': 1,
+    'users-list': 3,
+    'users-detail': 2,
+    'users-me': 1,
+    'subscriptions': 4,
+    'tags-list': 1,
+    'ingredients-list': 1,
+}
+
+# Профилирование запросов по токену issue_profile_token.
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILE_RING_SIZE = int(os.getenv('PROFILE_RING_SIZE', default=50))
+PROFILE_TOKEN_MAX_AGE = int(os.getenv('PROFILE_TOKEN_MAX_AGE', default=3600))
+
+# Кэш ответов, тегов и токенов сбрасывается сигналами при записи, поэтому
+# должен быть общим для всех воркеров: LocMemCache сбрасывается только в
+# процессе, обработавшем запись, остальные отдают старые данные до конца
+# TTL. При REDIS_URL кэш хранится в Redis.
+REDIS_URL = os.getenv('REDIS_URL')
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+SHARED_CACHE_BACKEND = 'django.core.cache.backends.redis.RedisCache'
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default=SHARED_CACHE_BACKEND if REDIS_URL
+            else LOCAL_CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default=REDIS_URL or 'foodgram'),
+    },
+    # Счетчики лимитов: в памяти процесса каждый воркер считает свой
+    # лимит, и фактический лимит умножается на число воркеров.
+    'throttle': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            default=SHARED_CACHE_BACKEND if REDIS_URL
+            else LOCAL_CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'THROTTLE_CACHE_LOCATION', default=REDIS_URL or 'throttle'),
+    },
+}
+THROTTLE_CACHE = 'throttle'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -94,8 +196,6 @@ TIME_ZONE = 'Europe/Moscow'
 
 USE_I18N = True
 
-USE_L10N = True
-
 USE_TZ = True
 
 STATIC_URL = "/backend_static/"
@@ -113,12 +213,23 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.SlidingWindowThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'pdf': os.getenv('THROTTLE_PDF', default='5/min'),
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', default='30/min'),
+        'ingredient_search': os.getenv(
+            'THROTTLE_INGREDIENT_SEARCH', default='120/min'),
+    },
+    # Перед приложением стоит nginx, адрес клиента - в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',)
 }
 
@@ -134,3 +245,57 @@ DJOSER = {
         'current_user': 'api.serializers.RegistrationSerializer',
     }
 }
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=60))
+TOKEN_CACHE_SHARED = os.getenv('TOKEN_CACHE_SHARED') == 'True'
+
+STATELESS_AUTH = os.getenv('STATELESS_AUTH') == 'True'
+if STATELESS_AUTH:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].insert(
+        0, 'api.authentication.StatelessJWTAuthentication')
+
+SIMPLE_JWT = {
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', default=15))),
+    'TOKEN_OBTAIN_SERIALIZER':
+        'api.serializers.StatelessTokenObtainSerializer',
+}
+
+FEED_TIMELINE_ENABLED = os.getenv('FEED_TIMELINE_ENABLED') == 'True'
+FEED_TIMELINE_SIZE = int(os.getenv('FEED_TIMELINE_SIZE', default=200))
+FEED_TIMELINE_TTL = int(os.getenv('FEED_TIMELINE_TTL', default=60 * 60))
+
+TRENDING_HALF_LIFE_HOURS = int(
+    os.getenv('TRENDING_HALF_LIFE_HOURS', default=24))
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=7))
+
+COOK_INDEX_TTL = int(os.getenv('COOK_INDEX_TTL', default=5 * 60))
+
+TAG_CACHE_TTL = int(os.getenv('TAG_CACHE_TTL', default=5 * 60))
+
+# Интервал записи буфера просмотров рецептов в RecipeStats.
+VIEW_COUNTS_FLUSH_SECONDS = int(
+    os.getenv('VIEW_COUNTS_FLUSH_SECONDS', default=10))
+
+PDF_MAX_CONCURRENCY = int(os.getenv('PDF_MAX_CONCURRENCY', default=2))
+PDF_RETRY_AFTER = int(os.getenv('PDF_RETRY_AFTER', default=5))
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', default=6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv('COMPRESSION_BROTLI_QUALITY', default=5))
+COMPRESSION_EXCLUDE_PATHS = ('/api/auth/',)
+
+# Анонимные ответы справочников и рецептов, 0 - без кэша.
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', default=60))
+RESPONSE_CACHE_PATHS = ('/api/tags/', '/api/ingredients/', '/api/recipes/')
+
+# Кэш nginx для тех же ответов, 0 - без кэша.
+EDGE_CACHE_TTL = int(os.getenv('EDGE_CACHE_TTL', default=5))
+EDGE_PURGER = os.getenv('EDGE_PURGER', default='api.purge.NoopPurger')
+EDGE_PURGE_URLS = [
+    url for url in os.getenv('EDGE_PURGE_URLS', default='').split(',') if url
+]
+EDGE_PURGE_TIMEOUT = float(os.getenv('EDGE_PURGE_TIMEOUT', default=2))
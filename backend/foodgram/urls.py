@@ -7,6 +7,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("recipes.urls")),
     path('api/', include('users.urls')),
+    path('api/', include('api.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,42 @@
+import gc
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+# Синхронные воркеры: медленных клиентов принимает nginx, буферизуя
+# запросы и ответы, а асинхронные представления в Django 4.2 и DRF все
+# равно ходят в ORM и кэш через поток sync_to_async. Под ASGI те же
+# представления обслуживают меньше запросов в секунду, см.
+# bench_slow_clients.
+worker_class = 'sync'
+workers = int(os.getenv('GUNICORN_WORKERS', default=2))
+# Приложение загружается и прогревается в мастере один раз, воркеры
+# делят его память через copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', default='True') == 'True'
+
+
+def when_ready(server):
+    """Прогрев мастера после предзагрузки, до запуска воркеров."""
+    if not server.cfg.preload_app:
+        return
+    from api.warmup import warm_up
+
+    warm_up()
+    # Объекты мастера исключаются из сборки мусора, чтобы она в
+    # воркерах не трогала их заголовки и не копировала страницы.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Сброс пулов соединений, унаследованных воркером от мастера."""
+    from foodgram.db.pool import reset_pools
+
+    reset_pools()
+
+
+def post_worker_init(worker):
+    """Прогрев воркера, если приложение не предзагружено."""
+    if worker.cfg.preload_app:
+        return
+    from api.warmup import warm_up
+
+    warm_up()
@@ -1,23 +1,120 @@
 from django.contrib import admin
-
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from api.deletion import soft_delete_recipe, soft_delete_user
+from api.documents import refresh_document
+from api.shopping_list import change_recipe, recipe_amounts
 from users.models import User, Subscription
 from .models import (
     Favorite, Ingredient, IngredientAmount, Recipe,
     ShoppingCart, Tag, TagRecipe,
 )
 
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с оценкой числа строк для больших таблиц.
+
+    Без фильтров в PostgreSQL число строк берется из статистики
+    pg_class вместо COUNT(*) по всей таблице. Фильтр менеджера по
+    умолчанию, например скрытие удаленных рецептов, фильтром не
+    считается: оценка и так приблизительная.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if (connection.vendor == 'postgresql' and queryset.query.where
+                == queryset.model._default_manager.all().query.where):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)])
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+        return super().count
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех значений."""
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return (('', ''),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        ]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup: self.value().strip()})
+        return queryset
+
+
+class AuthorFilter(InputFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    lookup = 'author__username'
+
+
+class UserFilter(InputFilter):
+    title = 'пользователю'
+    parameter_name = 'user'
+    lookup = 'user__username'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Базовый класс админки больших таблиц."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+class SoftDeleteAdmin(LargeTableAdmin):
+    """Базовый класс админки моделей с мягким удалением.
+
+    Подтверждение удаления не собирает каскад связанных строк: запись
+    скрывается, а связи удаляет по частям команда purge_deleted.
+    """
+    soft_delete = None
+
+    def get_deleted_objects(self, objs, request):
+        return ([str(obj) for obj in objs],
+                {self.model._meta.verbose_name_plural: len(objs)}, set(), [])
+
+    def delete_model(self, request, obj):
+        self.soft_delete(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.soft_delete(obj)
+
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(SoftDeleteAdmin):
+    soft_delete = staticmethod(soft_delete_user)
     list_display = ('username', 'email', 'id')
-    search_fields = ('username', 'email')
-    empty_value_display = '-пусто-'
-    list_filter = ('username', 'email')
+    search_fields = ('^username', '^email')
 
 
 class IngredientAmountInline(admin.TabularInline):
     model = IngredientAmount
     extra = 0
+    autocomplete_fields = ('ingredient',)
 
 
 class TagRecipeInline(admin.TabularInline):
@@ -26,11 +123,10 @@ class TagRecipeInline(admin.TabularInline):
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(LargeTableAdmin):
     list_display = ('name', 'measurement_unit')
-    search_fields = ('name', )
-    empty_value_display = '-пусто-'
-    list_filter = ('name',)
+    search_fields = ('^name', )
+    list_filter = ('measurement_unit',)
 
 
 @admin.register(Tag)
@@ -38,43 +134,64 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'color', 'slug')
     search_fields = ('name', )
     empty_value_display = '-пусто-'
-    list_filter = ('name',)
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe', 'id')
-    search_fields = ('user', )
-    empty_value_display = '-пусто-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+    search_fields = ('^user__username', '^recipe__name')
+    list_filter = (UserFilter,)
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe')
-    search_fields = ('user', )
-    empty_value_display = '-пусто-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+    search_fields = ('^user__username', '^recipe__name')
+    list_filter = (UserFilter,)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteAdmin):
+    soft_delete = staticmethod(soft_delete_recipe)
     inlines = (IngredientAmountInline, TagRecipeInline,)
     list_display = ('name', 'author', 'cooking_time',
                     'id', 'count_favorite', 'pub_date')
-    search_fields = ('name', 'author', 'tags')
-    empty_value_display = '-пусто-'
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
+    search_fields = ('^name', '^author__username')
+    list_filter = (AuthorFilter, 'tags')
+
+    def get_queryset(self, request):
+        # Подзапрос считается только для строк страницы, а не для
+        # всей таблицы, как при annotate(Count()) с GROUP BY.
+        return super().get_queryset(request).defer('document').annotate(
+            favorite_count=Coalesce(Subquery(
+                Favorite.objects.filter(recipe=OuterRef('pk')).order_by()
+                .values('recipe').annotate(count=Count('*'))
+                .values('count'),
+                output_field=IntegerField()), 0))
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = recipe_amounts(form.instance.id)
+        super().save_related(request, form, formsets, change)
+        change_recipe(form.instance.id, old_amounts,
+                      recipe_amounts(form.instance.id))
+        refresh_document(form.instance)
 
     def count_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorite_count
 
     count_favorite.short_description = 'Число добавлений в избранное'
 
 
 @admin.register(Subscription)
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(LargeTableAdmin):
     list_display = ('user', 'following')
-    search_fields = ('user', )
-    empty_value_display = '-пусто-'
-    list_filter = ('user',)
\ No newline at end of file
+    list_select_related = ('user', 'following')
+    raw_id_fields = ('user', 'following')
+    search_fields = ('^user__username', '^following__username')
+    list_filter = (UserFilter,)
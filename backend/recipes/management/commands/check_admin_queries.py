@@ -0,0 +1,124 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from recipes.admin import EstimatedCountPaginator
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, ShoppingCart, Tag,
+    TagRecipe,
+)
+from users.models import Subscription, User
+
+# Число запросов на странице списка админки, не зависящее от числа строк.
+# В PostgreSQL к нему добавляется запрос оценки числа строк у списков с
+# EstimatedCountPaginator: на малой таблице после него выполняется и
+# COUNT(*).
+CHANGELIST_QUERIES = {
+    User: 2,
+    Ingredient: 3,
+    Tag: 3,
+    Recipe: 3,
+    ShoppingCart: 2,
+    Favorite: 2,
+    Subscription: 2,
+}
+
+
+def uses_estimate(model):
+    """Метод проверки, оценивает ли список админки число строк."""
+    return connection.vendor == 'postgresql' and issubclass(
+        admin.site._registry[model].paginator, EstimatedCountPaginator)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет, что страницы списков админки выполняют '
+            'фиксированное число запросов при любом числе строк. Данные '
+            'создаются в транзакции, которая откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20,
+                            help='Строк на первом шаге, на втором - втрое '
+                                 'больше')
+
+    def handle(self, *args, **options):
+        superuser = User(username='admin', is_staff=True, is_superuser=True,
+                         is_active=True)
+        failures = []
+        with transaction.atomic():
+            self.create_data(0, options['rows'])
+            first = self.count_queries(superuser)
+            self.create_data(options['rows'], options['rows'] * 3)
+            second = self.count_queries(superuser)
+            transaction.set_rollback(True)
+        for model, expected in CHANGELIST_QUERIES.items():
+            name = model._meta.verbose_name_plural
+            estimated = uses_estimate(model)
+            expected += estimated
+            self.stdout.write(
+                f'{name}: {len(first[model])} -> {len(second[model])} '
+                f'(ожидается {expected})')
+            if not len(first[model]) == len(second[model]) == expected:
+                failures.append(str(name))
+            elif estimated and not any(
+                    'pg_class' in sql for sql in second[model]):
+                failures.append(f'{name} (без оценки числа строк)')
+        if failures:
+            raise CommandError(
+                'Число запросов изменилось: ' + ', '.join(failures))
+
+    @staticmethod
+    def count_queries(user):
+        """Метод сбора запросов отрисовки списков админки."""
+        counts = {}
+        for model in CHANGELIST_QUERIES:
+            request = RequestFactory().get('/admin/')
+            request.user = user
+            with CaptureQueriesContext(connection) as queries:
+                admin.site._registry[model].changelist_view(request).render()
+            counts[model] = [
+                query['sql'] for query in queries.captured_queries]
+        return counts
+
+    @staticmethod
+    def create_data(start, stop):
+        """Метод создания связанных строк всех моделей админки."""
+        users = User.objects.bulk_create([
+            User(username=f'admin_check_{index}',
+                 email=f'admin_check_{index}@example.com')
+            for index in range(start, stop)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'admin_check_{index}', color=f'#{index:06d}',
+                slug=f'admin_check_{index}')
+            for index in range(start, stop)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'admin_check_{index}', measurement_unit='г')
+            for index in range(start, stop)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=author, name=f'admin_check_{author.username}',
+                   image='recipes/image/admin_check.png', text='-',
+                   cooking_time=1)
+            for author in users
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe, tag in zip(recipes, tags)
+        ])
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(recipe=recipe, ingredient=ingredient)
+            for recipe, ingredient in zip(recipes, ingredients)
+        ])
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create([
+                model(user=user, recipe=recipe)
+                for user, recipe in zip(users, reversed(recipes))
+            ])
+        Subscription.objects.bulk_create([
+            Subscription(user=user, following=author)
+            for user, author in zip(users, reversed(users))
+            if user != author
+        ])
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import IngredientAmount, ShoppingCart, ShoppingListItem
+from users.models import User
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Сверяет итоги списков покупок с суммой ингредиентов рецептов '
+            'в корзинах и завершается ошибкой при расхождении. С --fix '
+            'пересчитывает расходящиеся списки, например после миграции.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Пересчитать расходящиеся списки')
+
+    def handle(self, *args, **options):
+        user_ids = sorted(
+            set(ShoppingCart.objects.values_list('user_id', flat=True))
+            | set(ShoppingListItem.objects.values_list('user_id', flat=True)))
+        stale = []
+        for start in range(0, len(user_ids), CHUNK_SIZE):
+            chunk = user_ids[start:start + CHUNK_SIZE]
+            with transaction.atomic():
+                expected, actual = self.get_totals(chunk, options['fix'])
+                changed = [
+                    user_id for user_id in chunk
+                    if expected.get(user_id, {}) != actual.get(user_id, {})
+                ]
+                if options['fix'] and changed:
+                    self.rewrite(changed, expected)
+            stale.extend(changed)
+        self.stdout.write(
+            f'Проверено списков: {len(user_ids)}, '
+            f'расхождений: {len(stale)}')
+        if stale and not options['fix']:
+            raise CommandError(
+                'Итоги устарели у пользователей: '
+                + ', '.join(map(str, stale[:20])))
+
+    @staticmethod
+    def get_totals(user_ids, lock):
+        """Метод расчета ожидаемых и чтения сохраненных итогов."""
+        if lock:
+            # Та же блокировка, что у изменений списков в apply_deltas.
+            list(User.objects.select_for_update().filter(
+                id__in=user_ids).order_by('id').values_list('id'))
+        actual = {}
+        for user_id, ingredient_id, total in ShoppingListItem.objects.filter(
+                user_id__in=user_ids).values_list(
+                'user_id', 'ingredient_id', 'total'):
+            actual.setdefault(user_id, {})[ingredient_id] = total
+        expected = {}
+        for row in IngredientAmount.objects.filter(
+                recipe__shoppingcarts__user_id__in=user_ids).values(
+                    'recipe__shoppingcarts__user_id',
+                    'ingredient_id').annotate(total=Sum('amount')):
+            expected.setdefault(row['recipe__shoppingcarts__user_id'], {})[
+                row['ingredient_id']] = row['total']
+        return expected, actual
+
+    @staticmethod
+    def rewrite(user_ids, expected):
+        """Метод замены итогов пользователей рассчитанными."""
+        ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, total=total)
+            for user_id in user_ids
+            for ingredient_id, total in expected.get(user_id, {}).items()
+        ])
@@ -0,0 +1,86 @@
+import sys
+from itertools import islice
+
+import orjson
+from django.core.management.base import BaseCommand
+
+from api.documents import build_documents
+from recipes.models import Recipe
+
+CHUNK_SIZE = 1000
+
+
+def export_recipe(recipe, document):
+    """Метод приведения рецепта к строке выгрузки.
+
+    Связи выгружаются естественными ключами, а не id: автор - по
+    username, тег - по slug, продукт - по названию и единице.
+    """
+    author = document['author']
+    return {
+        'id': recipe['id'],
+        'author': {
+            field: author[field]
+            for field in ('username', 'email', 'first_name', 'last_name')
+        },
+        'name': recipe['name'],
+        'text': recipe['text'],
+        'cooking_time': recipe['cooking_time'],
+        'image': recipe['image'],
+        'pub_date': recipe['pub_date'],
+        'tags': [
+            {field: tag[field] for field in ('name', 'color', 'slug')}
+            for tag in document['tags']
+        ],
+        'ingredients': [
+            {
+                field: ingredient[field]
+                for field in ('name', 'measurement_unit', 'amount')
+            }
+            for ingredient in document['ingredients']
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Выгружает рецепты с автором, тегами, ингредиентами и путем '
+            'к изображению в формате JSON Lines. Рецепты читаются '
+            'серверным курсором, поэтому память не зависит от их числа. '
+            'Файлы изображений переносятся отдельно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='Файл выгрузки, по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--after-id', type=int, default=0,
+                            help='Выгрузить рецепты с id больше заданного')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.filter(
+            id__gt=options['after_id']).order_by('id').values(
+                'id', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+                'document').iterator(chunk_size=options['chunk_size'])
+        output = (sys.stdout.buffer if options['output'] == '-'
+                  else open(options['output'], 'wb'))
+        exported = 0
+        try:
+            while True:
+                chunk = list(islice(recipes, options['chunk_size']))
+                if not chunk:
+                    break
+                documents = build_documents([
+                    recipe['id'] for recipe in chunk
+                    if recipe['document'] is None
+                ])
+                output.writelines(
+                    orjson.dumps(export_recipe(
+                        recipe,
+                        recipe['document'] or documents[recipe['id']]))
+                    + b'\n'
+                    for recipe in chunk
+                )
+                exported += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        self.stderr.write(f'Выгружено рецептов: {exported}')
@@ -0,0 +1,200 @@
+import os
+from itertools import islice
+
+import orjson
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from api.catalog import invalidate_tags
+from api.documents import (
+    DOCUMENT_AUTHOR_FIELDS, DOCUMENT_INGREDIENT_FIELDS, DOCUMENT_TAG_FIELDS,
+)
+from api.purge import purge
+from foodgram.compression import invalidate_response_cache
+from recipes.models import (
+    Ingredient, IngredientAmount, Recipe, RecipeStats, Tag, TagRecipe,
+)
+from users.models import User
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Загружает рецепты из выгрузки export_catalog. Строки '
+            'читаются потоком и сохраняются частями через bulk_create, '
+            'каждая часть - в своей транзакции. После каждой части номер '
+            'строки пишется в файл контрольной точки, и с --resume загрузка '
+            'продолжается с него. Рецепт, уже существующий у автора с тем '
+            'же названием и датой публикации, пропускается, поэтому '
+            'повторная загрузка части не создает дубликатов. Недостающие '
+            'авторы, теги и продукты создаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл выгрузки JSON Lines')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--checkpoint',
+                            help='Файл контрольной точки, по умолчанию '
+                                 '<input>.checkpoint')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить с контрольной точки')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or options['input'] + '.checkpoint'
+        done = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                done = int(file.read())
+        imported = skipped = 0
+        with open(options['input'], 'rb') as lines:
+            for _ in islice(lines, done):
+                pass
+            while True:
+                chunk = [
+                    orjson.loads(line)
+                    for line in islice(lines, options['chunk_size'])
+                    if line.strip()
+                ]
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    created = self.import_chunk(chunk)
+                imported += created
+                skipped += len(chunk) - created
+                done += len(chunk)
+                with open(checkpoint, 'w') as file:
+                    file.write(str(done))
+                self.stderr.write(f'Строк обработано: {done}')
+        if imported:
+            invalidate_tags()
+            invalidate_response_cache()
+            purge('recipes', 'tags', 'ingredients', 'catalog')
+        self.stdout.write(
+            f'Загружено рецептов: {imported}, пропущено: {skipped}')
+
+    def import_chunk(self, chunk):
+        """Метод сохранения части рецептов пакетными запросами."""
+        authors = self.get_authors(chunk)
+        tags = self.get_tags(chunk)
+        ingredients = self.get_ingredients(chunk)
+        for row in chunk:
+            row['pub_date'] = parse_datetime(row['pub_date'])
+        # Поиск по индексу автора и даты, а не по всем рецептам авторов.
+        existing = set(Recipe.objects.filter(
+            author__in=authors.values(),
+            pub_date__in={row['pub_date'] for row in chunk}).values_list(
+                'author_id', 'name', 'pub_date'))
+        rows = [
+            row for row in chunk
+            if (authors[row['author']['username']].id, row['name'],
+                row['pub_date']) not in existing
+        ]
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=authors[row['author']['username']],
+                   name=row['name'], text=row['text'],
+                   cooking_time=row['cooking_time'], image=row['image'],
+                   document=self.build_document(row, authors, tags,
+                                                ingredients))
+            for row in rows
+        ])
+        # auto_now_add перезаписывает дату при вставке.
+        for recipe, row in zip(recipes, rows):
+            recipe.pub_date = row['pub_date']
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        RecipeStats.objects.bulk_create(
+            [RecipeStats(recipe_id=recipe.id) for recipe in recipes])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe_id=recipe.id, tag_id=tags[tag['slug']].id)
+            for recipe, row in zip(recipes, rows)
+            for tag in row['tags']
+        ])
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[
+                    ingredient['name'], ingredient['measurement_unit']].id,
+                amount=ingredient['amount'])
+            for recipe, row in zip(recipes, rows)
+            for ingredient in row['ingredients']
+        ])
+        return len(recipes)
+
+    @staticmethod
+    def build_document(row, authors, tags, ingredients):
+        """Метод сборки документа рецепта из строки без запросов.
+
+        Результат совпадает с build_documents, поэтому пересобирать
+        документы после вставки не нужно.
+        """
+        author = authors[row['author']['username']]
+        return {
+            'author': {
+                field: getattr(author, field)
+                for field in DOCUMENT_AUTHOR_FIELDS
+            },
+            'ingredients': [
+                {
+                    field: (ingredient['amount'] if field == 'amount'
+                            else getattr(ingredients[
+                                ingredient['name'],
+                                ingredient['measurement_unit']], field))
+                    for field in DOCUMENT_INGREDIENT_FIELDS
+                }
+                for ingredient in row['ingredients']
+            ],
+            'tags': sorted((
+                {
+                    field: getattr(tags[tag['slug']], field)
+                    for field in DOCUMENT_TAG_FIELDS
+                }
+                for tag in row['tags']
+            ), key=lambda tag: tag['id']),
+        }
+
+    @staticmethod
+    def get_authors(chunk):
+        """Метод поиска и создания авторов части по username."""
+        rows = {row['author']['username']: row['author'] for row in chunk}
+        authors = User.objects.in_bulk(rows, field_name='username')
+        missing = [
+            User(**author) for username, author in rows.items()
+            if username not in authors
+        ]
+        for user in missing:
+            user.set_unusable_password()
+        User.objects.bulk_create(missing)
+        authors.update((user.username, user) for user in missing)
+        return authors
+
+    @staticmethod
+    def get_tags(chunk):
+        """Метод поиска и создания тегов части по slug."""
+        rows = {tag['slug']: tag for row in chunk for tag in row['tags']}
+        tags = Tag.objects.in_bulk(rows, field_name='slug')
+        missing = [Tag(**tag) for slug, tag in rows.items()
+                   if slug not in tags]
+        Tag.objects.bulk_create(missing)
+        tags.update((tag.slug, tag) for tag in missing)
+        return tags
+
+    @staticmethod
+    def get_ingredients(chunk):
+        """Метод поиска и создания продуктов части по названию и единице."""
+        keys = {
+            (ingredient['name'], ingredient['measurement_unit'])
+            for row in chunk for ingredient in row['ingredients']
+        }
+        ingredients = {
+            (ingredient.name, ingredient.measurement_unit): ingredient
+            for ingredient in Ingredient.objects.filter(
+                name__in={name for name, _ in keys})
+        }
+        missing = [
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in keys - ingredients.keys()
+        ]
+        Ingredient.objects.bulk_create(missing)
+        ingredients.update(
+            ((ingredient.name, ingredient.measurement_unit), ingredient)
+            for ingredient in missing)
+        return ingredients
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.deletion import DELETE_CHUNK_SIZE, purge_recipe, purge_user
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Окончательно удаляет скрытых пользователей и рецепты. '
+            'Связанные строки удаляются частями по --chunk-size в '
+            'отдельных транзакциях, продукты удаленных рецептов вычитаются '
+            'из списков покупок. Запускается по расписанию; прерванный '
+            'запуск продолжается следующим.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            default=DELETE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        users = recipes = 0
+        for user_id in list(User.objects.filter(
+                deleted_at__isnull=False).values_list('id', flat=True)):
+            purge_user(user_id, chunk_size)
+            users += 1
+        for recipe_id in list(Recipe.all_objects.filter(
+                deleted_at__isnull=False).values_list('id', flat=True)):
+            purge_recipe(recipe_id, chunk_size)
+            recipes += 1
+        self.stdout.write(
+            f'Удалено пользователей: {users}, рецептов: {recipes}')
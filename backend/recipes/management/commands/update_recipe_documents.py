@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.documents import REFRESH_CHUNK_SIZE, build_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает сохраненные документы рецептов. По умолчанию '
+            'обновляются только рецепты без документа, например после '
+            'миграции; --full пересобирает все, --check только сверяет '
+            'документы со связями и завершается ошибкой при расхождении.')
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--full', action='store_true',
+                           help='Пересобрать все документы')
+        group.add_argument('--check', action='store_true',
+                           help='Только сверить документы')
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.order_by('id')
+        if not (options['full'] or options['check']):
+            queryset = queryset.filter(document__isnull=True)
+        recipe_ids = list(queryset.values_list('id', flat=True))
+        stale = 0
+        for start in range(0, len(recipe_ids), REFRESH_CHUNK_SIZE):
+            stale += self.refresh_chunk(
+                recipe_ids[start:start + REFRESH_CHUNK_SIZE],
+                options['check'])
+        if options['check']:
+            self.stdout.write(
+                f'Проверено рецептов: {len(recipe_ids)}, '
+                f'расхождений: {stale}')
+            if stale:
+                raise CommandError('Документы рецептов устарели')
+        else:
+            self.stdout.write(f'Обновлено документов: {stale}')
+
+    @staticmethod
+    def refresh_chunk(recipe_ids, check):
+        """Метод сверки и пересборки документов части рецептов."""
+        documents = build_documents(recipe_ids)
+        with transaction.atomic():
+            stale = [
+                recipe for recipe in Recipe.objects.filter(
+                    id__in=recipe_ids).only('id', 'document')
+                if recipe.document != documents[recipe.id]
+            ]
+            if not check:
+                for recipe in stale:
+                    recipe.document = documents[recipe.id]
+                Recipe.objects.bulk_update(stale, ['document'])
+        return len(stale)
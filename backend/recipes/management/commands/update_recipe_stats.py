@@ -0,0 +1,88 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeStats, ShoppingCart
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает популярность и тренды рецептов. По умолчанию '
+            'обновляются только рецепты с новыми добавлениями с прошлого '
+            'запуска и рецепты с ненулевым трендом; удаления из избранного '
+            'и корзин учитываются полным пересчетом (--full).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Пересчитать все рецепты')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        last_refresh = RecipeStats.objects.aggregate(
+            last=Max('refreshed'))['last']
+        self.create_missing_stats()
+        if options['full'] or last_refresh is None:
+            recipe_ids = RecipeStats.objects.values_list(
+                'recipe_id', flat=True)
+        else:
+            recipe_ids = self.get_changed_recipe_ids(last_refresh)
+        recipe_ids = sorted(recipe_ids)
+        for start in range(0, len(recipe_ids), CHUNK_SIZE):
+            self.refresh_chunk(recipe_ids[start:start + CHUNK_SIZE], now)
+        self.stdout.write(f'Обновлено рецептов: {len(recipe_ids)}')
+
+    @staticmethod
+    def create_missing_stats():
+        """Метод создания строк статистики для новых рецептов."""
+        missing_ids = Recipe.objects.filter(
+            stats__isnull=True).values_list('id', flat=True)
+        RecipeStats.objects.bulk_create(
+            [RecipeStats(recipe_id=recipe_id) for recipe_id in missing_ids],
+            batch_size=CHUNK_SIZE, ignore_conflicts=True)
+
+    @staticmethod
+    def get_changed_recipe_ids(last_refresh):
+        """Метод выбора рецептов, статистика которых могла измениться."""
+        recipe_ids = set(RecipeStats.objects.filter(
+            refreshed__isnull=True).values_list('recipe_id', flat=True))
+        recipe_ids.update(RecipeStats.objects.filter(
+            trending__gt=0).values_list('recipe_id', flat=True))
+        for model in (Favorite, ShoppingCart):
+            recipe_ids.update(model.objects.filter(
+                created__gte=last_refresh).values_list(
+                    'recipe_id', flat=True))
+        return recipe_ids
+
+    @staticmethod
+    def refresh_chunk(recipe_ids, now):
+        """Метод пересчета статистики пачки рецептов."""
+        half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+        window_start = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        popularity = Counter()
+        trending = defaultdict(float)
+        for model in (Favorite, ShoppingCart):
+            queryset = model.objects.filter(recipe_id__in=recipe_ids)
+            for row in queryset.values('recipe_id').annotate(
+                    total=Count('id')).order_by():
+                popularity[row['recipe_id']] += row['total']
+            for recipe_id, created in queryset.filter(
+                    created__gte=window_start).values_list(
+                        'recipe_id', 'created'):
+                age = (now - created).total_seconds()
+                trending[recipe_id] += 0.5 ** (age / half_life)
+        stats = [
+            RecipeStats(recipe_id=recipe_id,
+                        popularity=popularity[recipe_id],
+                        trending=trending[recipe_id],
+                        refreshed=now)
+            for recipe_id in recipe_ids
+        ]
+        with transaction.atomic():
+            RecipeStats.objects.bulk_update(
+                stats, ['popularity', 'trending', 'refreshed'])
@@ -0,0 +1,128 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from scipy import sparse
+
+from recipes.models import IngredientAmount, SimilarRecipe, TagRecipe
+
+
+class Command(BaseCommand):
+    help = ('Предрасчитывает похожие рецепты по общим продуктам и тегам '
+            'и сохраняет их в таблицу SimilarRecipe.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10,
+                            help='Сколько похожих рецептов сохранять')
+        parser.add_argument('--metric', choices=('jaccard', 'cosine'),
+                            default='jaccard')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько строк матрицы умножать за раз')
+
+    def handle(self, *args, **options):
+        recipe_ids, matrix = self.build_matrix()
+        self.drop_stale(recipe_ids)
+        if not len(recipe_ids):
+            self.stdout.write('Нет рецептов для расчета')
+            return
+        sizes = np.asarray(matrix.getnnz(axis=1), dtype=np.float64)
+        transposed = matrix.T.tocsr()
+        batch_size = options['batch_size']
+        for start in range(0, len(recipe_ids), batch_size):
+            stop = min(start + batch_size, len(recipe_ids))
+            overlap = (matrix[start:stop] @ transposed).tocoo()
+            scores = self.score(overlap, sizes, start, options['metric'])
+            self.save_batch(
+                recipe_ids, start, stop,
+                self.top_neighbours(overlap, scores, stop - start,
+                                    options['top']))
+        self.stdout.write(f'Обработано рецептов: {len(recipe_ids)}')
+
+    @staticmethod
+    def build_matrix():
+        """Метод построения разреженной матрицы рецепт x признак.
+
+        Признаки - продукты рецепта и его теги, значения бинарные.
+        Удаленные рецепты в матрицу не попадают.
+        """
+        ingredients = np.array(
+            IngredientAmount.objects.filter(
+                recipe__deleted_at__isnull=True).values_list(
+                'recipe_id', 'ingredient_id').order_by(),
+            dtype=np.int64).reshape(-1, 2)
+        tags = np.array(
+            TagRecipe.objects.filter(
+                recipe__deleted_at__isnull=True).values_list(
+                'recipe_id', 'tag_id').order_by(),
+            dtype=np.int64).reshape(-1, 2)
+        recipe_ids = np.union1d(ingredients[:, 0], tags[:, 0])
+        ingredient_ids, ingredient_columns = np.unique(
+            ingredients[:, 1], return_inverse=True)
+        _, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+        rows = np.concatenate([
+            np.searchsorted(recipe_ids, ingredients[:, 0]),
+            np.searchsorted(recipe_ids, tags[:, 0]),
+        ])
+        columns = np.concatenate([
+            ingredient_columns, tag_columns + len(ingredient_ids)])
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(recipe_ids), columns.max(initial=-1) + 1))
+        matrix.data[:] = 1
+        return recipe_ids, matrix
+
+    @staticmethod
+    def drop_stale(recipe_ids):
+        """Метод удаления соседей рецептов, выпавших из расчета.
+
+        Соседи рецептов из расчета заменяются по пачкам в save_batch, а
+        строки удаленных рецептов и рецептов без продуктов и тегов
+        иначе остались бы в таблице.
+        """
+        SimilarRecipe.objects.exclude(
+            recipe_id__in=[int(recipe_id) for recipe_id in recipe_ids]
+        ).delete()
+
+    @staticmethod
+    def score(overlap, sizes, offset, metric):
+        """Метод расчета сходства для ненулевых пересечений пачки."""
+        left = sizes[overlap.row + offset]
+        right = sizes[overlap.col]
+        if metric == 'cosine':
+            scores = overlap.data / np.sqrt(left * right)
+        else:
+            scores = overlap.data / (left + right - overlap.data)
+        scores[overlap.row + offset == overlap.col] = 0
+        return scores
+
+    @staticmethod
+    def top_neighbours(overlap, scores, rows_count, top):
+        """Метод выбора top-k соседей для каждой строки пачки."""
+        order = np.lexsort((-scores, overlap.row))
+        rows, columns, scores = (
+            overlap.row[order], overlap.col[order], scores[order])
+        bounds = np.searchsorted(rows, np.arange(rows_count + 1))
+        for row in range(rows_count):
+            begin, end = bounds[row], min(bounds[row + 1], bounds[row] + top)
+            yield row, [
+                (column, score)
+                for column, score in zip(columns[begin:end],
+                                         scores[begin:end])
+                if score > 0
+            ]
+
+    @staticmethod
+    def save_batch(recipe_ids, start, stop, neighbours):
+        """Метод замены сохраненных соседей для рецептов пачки."""
+        similar = [
+            SimilarRecipe(recipe_id=int(recipe_ids[start + row]),
+                          similar_id=int(recipe_ids[column]),
+                          score=float(score))
+            for row, row_neighbours in neighbours
+            for column, score in row_neighbours
+        ]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__in=[int(recipe_id)
+                               for recipe_id in recipe_ids[start:stop]]
+            ).delete()
+            SimilarRecipe.objects.bulk_create(similar, batch_size=1000)
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0003_auto_20221012_2010'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favorite',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientamount',
+            name='amount',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Введите количество ингредиента', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1000)], verbose_name='Количество ингредиентов'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientamount',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(help_text='Выберите автора рецепта', on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='cooking_time',
+            field=models.PositiveSmallIntegerField(help_text='Введите время приготовления', validators=[django.core.validators.MinValueValidator(1, 'Значение не может быть меньше 1'), django.core.validators.MaxValueValidator(300, 'Значение не может быть больше 300')], verbose_name='Время приготовления'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='tags',
+            field=models.ManyToManyField(help_text='Выберите теги рецепта', through='recipes.TagRecipe', to='recipes.tag', verbose_name='Теги рецептов'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='text',
+            field=models.TextField(help_text='Введите описания рецепта', max_length=1000, verbose_name='Описание рецепта'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='tagrecipe',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        # Подписки переезжают в приложение users вместе со строками:
+        # таблица переименовывается, а модель создается только в
+        # состоянии миграций users.0002.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterModelTable(
+                    name='subscription',
+                    table='users_subscription',
+                ),
+            ],
+            state_operations=[
+                migrations.DeleteModel(
+                    name='Subscription',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('popularity', models.PositiveIntegerField(db_index=True, default=0, help_text='Число добавлений в избранное и в корзины', verbose_name='Популярность')),
+                ('trending', models.FloatField(db_index=True, default=0, help_text='Число добавлений с затуханием по времени', verbose_name='Рейтинг трендов')),
+                ('refreshed', models.DateTimeField(blank=True, null=True, verbose_name='Дата пересчета')),
+            ],
+            options={
+                'verbose_name': 'Статистика рецепта',
+                'verbose_name_plural': 'Статистика рецептов',
+            },
+        ),
+        # Поля добавляются без значения по умолчанию, чтобы у старых
+        # строк дата осталась пустой, а не стала датой миграции и не
+        # попала в окно тренда.
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(db_index=True, null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(db_index=True, null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, null=True, verbose_name='Дата добавления'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='document',
+            field=models.JSONField(editable=False, help_text='Автор, теги и ингредиенты в виде ответа API', null=True, verbose_name='Документ рецепта'),
+        ),
+    ]
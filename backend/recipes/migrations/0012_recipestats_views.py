@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipestats',
+            name='last_viewed',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего просмотра'),
+        ),
+        migrations.AddField(
+            model_name='recipestats',
+            name='views',
+            field=models.PositiveBigIntegerField(default=0, help_text='Записывается из буфера воркеров раз в интервал', verbose_name='Просмотры'),
+        ),
+    ]
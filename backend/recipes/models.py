@@ -2,6 +2,7 @@ from django.core.validators import (MinValueValidator,
                                     RegexValidator,
                                     MaxValueValidator)
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 
@@ -52,6 +53,13 @@ class Tag(models.Model):
         return self.name
 
 
+class ActiveRecipeManager(models.Manager):
+    """Менеджер рецептов без удаленных и ждущих очистки."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     """Создание модели рецептов."""
     author = models.ForeignKey(
@@ -96,12 +104,33 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата создания')
+    document = models.JSONField(
+        null=True,
+        editable=False,
+        verbose_name='Документ рецепта',
+        help_text='Автор, теги и ингредиенты в виде ответа API')
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата удаления',
+        help_text='Рецепт скрыт и ждет очистки командой purge_deleted')
+
+    objects = ActiveRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         """Параметры модели."""
         ordering = ('-pub_date', )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+            models.Index(fields=['deleted_at'], name='recipe_deleted_at_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         """Метод строкового представления модели."""
@@ -123,6 +152,13 @@ class ShoppingCart(models.Model):
         verbose_name='Рецепты',
         help_text='Выберите рецепты для добавления в корзины'
     )
+    # У строк, созданных до появления поля, даты нет: они учитываются
+    # в популярности, но не в тренде.
+    created = models.DateTimeField(
+        default=timezone.now,
+        null=True,
+        db_index=True,
+        verbose_name='Дата добавления')
 
     class Meta:
         """Параметры модели."""
@@ -138,6 +174,36 @@ class ShoppingCart(models.Model):
         return f'{self.user} {self.recipe}'
 
 
+class ShoppingListItem(models.Model):
+    """Создание модели итогов списка покупок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь')
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент')
+    total = models.PositiveIntegerField(
+        verbose_name='Количество',
+        help_text='Сумма количеств продукта по рецептам в корзине')
+
+    class Meta:
+        """Параметры модели."""
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ingredient'],
+                                    name='unique_shoppinglistitem')
+        ]
+
+    def __str__(self):
+        """Метод строкового представления модели."""
+        return f'{self.user} {self.ingredient} {self.total}'
+
+
 class IngredientAmount(models.Model):
     """Создание модели продуктов в рецепте."""
     ingredient = models.ForeignKey(
@@ -218,6 +284,13 @@ class Favorite(models.Model):
         verbose_name='Рецепт',
         help_text='Выберите рецепт'
     )
+    # У строк, созданных до появления поля, даты нет: они учитываются
+    # в популярности, но не в тренде.
+    created = models.DateTimeField(
+        default=timezone.now,
+        null=True,
+        db_index=True,
+        verbose_name='Дата добавления')
 
     class Meta:
         """Параметры модели."""
@@ -231,3 +304,72 @@ class Favorite(models.Model):
     def __str__(self):
         """Метод строкового представления модели."""
         return f'{self.recipe} {self.user}'
+
+
+class RecipeStats(models.Model):
+    """Создание модели материализованной статистики рецепта."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Рецепт')
+    popularity = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='Популярность',
+        help_text='Число добавлений в избранное и в корзины')
+    trending = models.FloatField(
+        default=0,
+        db_index=True,
+        verbose_name='Рейтинг трендов',
+        help_text='Число добавлений с затуханием по времени')
+    refreshed = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата пересчета')
+    views = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Просмотры',
+        help_text='Записывается из буфера воркеров раз в интервал')
+    last_viewed = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата последнего просмотра')
+
+    class Meta:
+        """Параметры модели."""
+        verbose_name = 'Статистика рецепта'
+        verbose_name_plural = 'Статистика рецептов'
+
+    def __str__(self):
+        """Метод строкового представления модели."""
+        return f'{self.recipe_id}: {self.popularity} / {self.trending:.2f}'
+
+
+class SimilarRecipe(models.Model):
+    """Создание модели предрасчитанных похожих рецептов."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar',
+        verbose_name='Рецепт')
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт')
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        """Параметры модели."""
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        indexes = [
+            models.Index(fields=['recipe', '-score'],
+                         name='similar_recipe_score_idx')
+        ]
+
+    def __str__(self):
+        """Метод строкового представления модели."""
+        return f'{self.recipe_id} ~ {self.similar_id}: {self.score:.2f}'
@@ -19,8 +19,5 @@ urlpatterns = [
     path('recipes/<int:recipes_id>/favorite/',
          FavoriteViewSet.as_view({'post': 'create',
                                   'delete': 'delete'}), name='favorite'),
-    path('recipes/download_shopping_cart/',
-         RecipeViewSet.as_view(
-          {'get': 'download_shoping_cart'}), name='download'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+
+import pytest
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.view_counts import view_counter
+from foodgram.db import querywatch
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, ShoppingCart, Tag,
+    TagRecipe,
+)
+from users.models import Subscription, User
+
+
+def clear_caches():
+    """Метод очистки всех кэшей Django."""
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Кэши и буфер просмотров не переживают откат транзакции теста."""
+    clear_caches()
+    yield
+    clear_caches()
+    with view_counter.lock:
+        view_counter.counts.clear()
+        view_counter.last_viewed.clear()
+
+
+@pytest.fixture
+def assert_queries():
+    """Проверка блока кода на N+1 и бюджет запросов.
+
+    Перед блоком очищаются кэши, поэтому считаются запросы ответа,
+    собранного заново, как в check_query_budgets.
+    """
+    @contextmanager
+    def check(budget=None, threshold=None):
+        clear_caches()
+        with querywatch.assert_queries(budget, threshold) as watcher:
+            yield watcher
+    return check
+
+
+@pytest.fixture
+def reader(db):
+    return User.objects.create(
+        username='reader', email='reader@example.com')
+
+
+@pytest.fixture
+def reader_client(reader):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=reader).key)
+    return client
+
+
+@pytest.fixture
+def make_data(reader):
+    """Фабрика авторов с рецептами, на которых подписан читатель.
+
+    У каждого автора два рецепта с первым и последним тегом и продуктом,
+    каждый второй рецепт в избранном и корзине читателя.
+    """
+    def make(count):
+        authors = User.objects.bulk_create([
+            User(username=f'author_{index}',
+                 email=f'author_{index}@example.com')
+            for index in range(count)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'tag_{index}', color=f'#{index:06d}',
+                slug=f'tag_{index}')
+            for index in range(count)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient_{index}', measurement_unit='г')
+            for index in range(count)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=author, name=f'{author.username}_{number}',
+                   image='recipes/image/test.png', text='-',
+                   cooking_time=1)
+            for author in authors
+            for number in range(2)
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in (tags[0], tags[-1])
+        ])
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in (ingredients[0], ingredients[-1])
+        ])
+        Subscription.objects.bulk_create([
+            Subscription(user=reader, following=author)
+            for author in authors
+        ])
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create([
+                model(user=reader, recipe=recipe) for recipe in recipes[::2]
+            ])
+        return {
+            'recipe': recipes[0].id,
+            'author': authors[0].id,
+            'ingredient': ingredients[0].id,
+        }
+    return make
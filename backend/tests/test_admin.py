@@ -0,0 +1,32 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes import admin
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Оценка числа строк есть только в PostgreSQL')
+
+
+@pytest.fixture
+def estimate_always(monkeypatch):
+    monkeypatch.setattr(admin, 'ESTIMATED_COUNT_THRESHOLD', -2)
+
+
+def count_queries(queryset):
+    with CaptureQueriesContext(connection) as context:
+        admin.EstimatedCountPaginator(queryset, 10).count
+    return [query['sql'] for query in context.captured_queries]
+
+
+def test_recipe_count_is_estimated(db, estimate_always):
+    queries = count_queries(Recipe.objects.all())
+    assert len(queries) == 1
+    assert 'pg_class' in queries[0]
+
+
+def test_filtered_recipe_count_is_exact(db, estimate_always):
+    queries = count_queries(Recipe.objects.filter(name='x'))
+    assert 'COUNT(' in queries[-1]
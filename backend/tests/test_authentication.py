@@ -0,0 +1,43 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api.authentication import (
+    CachedTokenAuthentication, StatelessJWTAuthentication,
+)
+from api.serializers import StatelessTokenObtainSerializer
+
+
+@pytest.fixture
+def bearer_client(reader, monkeypatch):
+    # Классы аутентификации читаются при объявлении APIView, как при
+    # STATELESS_AUTH=True.
+    monkeypatch.setattr(APIView, 'authentication_classes', [
+        StatelessJWTAuthentication, CachedTokenAuthentication])
+    token = StatelessTokenObtainSerializer.get_token(reader).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.parametrize('path', [
+    '/api/users/me/',
+    '/api/recipes/download_shopping_cart/',
+    '/api/recipes/shopping_list/',
+])
+def test_bearer_authenticates_every_endpoint(path, bearer_client):
+    assert bearer_client.get(path).status_code == HTTPStatus.OK
+
+
+def test_bearer_recipe_detail_marks(make_data, bearer_client):
+    recipe_id = make_data(2)['recipe']
+    data = bearer_client.get(f'/api/recipes/{recipe_id}/').json()
+    assert data['is_favorited'] is True
+    assert data['is_in_shopping_cart'] is True
+
+
+def test_anonymous_download_requires_authentication(db):
+    response = APIClient().get('/api/recipes/download_shopping_cart/')
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,24 @@
+import pytest
+
+from api.checks import SHARED_CACHES, check_shared_caches
+
+
+@pytest.fixture
+def cache_backend(settings):
+    def use(backend, location=''):
+        settings.CACHES = {
+            alias: {'BACKEND': backend, 'LOCATION': location}
+            for alias in settings.CACHES
+        }
+    return use
+
+
+def test_local_caches_warn(settings, cache_backend):
+    cache_backend(settings.LOCAL_CACHE_BACKEND)
+    assert [error.id for error in check_shared_caches(None)] == [
+        'api.W001'] * len(SHARED_CACHES)
+
+
+def test_shared_caches_pass(settings, cache_backend):
+    cache_backend(settings.SHARED_CACHE_BACKEND, 'redis://localhost:6379/0')
+    assert check_shared_caches(None) == []
@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+
+from api import matching
+from api.deletion import purge_recipe, soft_delete_recipe, soft_delete_user
+from api.shopping_list import get_shopping_list
+from recipes.models import (
+    Ingredient, IngredientAmount, Recipe, ShoppingCart, SimilarRecipe,
+)
+from users.models import User
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create(username='author', email='author@example.com')
+
+
+@pytest.fixture
+def ingredient(db):
+    return Ingredient.objects.create(name='соль', measurement_unit='г')
+
+
+@pytest.fixture
+def make_recipe(author, ingredient):
+    def make(name, amount):
+        recipe = Recipe.objects.create(
+            author=author, name=name, image='recipes/image/test.png',
+            text='-', cooking_time=1)
+        IngredientAmount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount)
+        return recipe
+    return make
+
+
+@pytest.fixture
+def cook_index(monkeypatch):
+    monkeypatch.setattr(matching, '_index', matching.build_index())
+    return matching._index
+
+
+def totals(user):
+    return [row['amount'] for row in get_shopping_list(user)]
+
+
+def test_soft_deleted_recipe_leaves_shopping_list(reader, make_recipe):
+    kept, deleted = make_recipe('kept', 2), make_recipe('deleted', 3)
+    for recipe in (kept, deleted):
+        ShoppingCart.objects.create(user=reader, recipe=recipe)
+    assert totals(reader) == [5]
+    soft_delete_recipe(deleted)
+    assert totals(reader) == [2]
+    purge_recipe(deleted.id)
+    assert totals(reader) == [2]
+    assert list(ShoppingCart.objects.filter(
+        user=reader).values_list('recipe_id', flat=True)) == [kept.id]
+
+
+def test_soft_delete_user_unindexes_recipes(reader, author, make_recipe,
+                                            ingredient, cook_index):
+    recipe = make_recipe('recipe', 1)
+    ShoppingCart.objects.create(user=reader, recipe=recipe)
+    cook_index.add_recipe(recipe.id, [ingredient.id])
+    soft_delete_user(author)
+    assert not cook_index.match([ingredient.id])
+    assert totals(reader) == []
+
+
+def test_similar_recipes_skip_soft_deleted(make_recipe):
+    first, second, deleted = (
+        make_recipe(name, 1) for name in ('first', 'second', 'deleted'))
+    call_command('update_similar_recipes')
+    assert SimilarRecipe.objects.filter(recipe=deleted).count() == 2
+    soft_delete_recipe(deleted)
+    call_command('update_similar_recipes')
+    assert set(SimilarRecipe.objects.values_list(
+        'recipe_id', 'similar_id')) == {
+        (first.id, second.id), (second.id, first.id)}
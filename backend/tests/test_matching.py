@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+from api import matching
+from api.matching import IngredientIndex
+
+
+@pytest.fixture
+def index():
+    return IngredientIndex.from_pairs(
+        [(1, 10), (1, 11), (2, 10), (3, 10), (3, 11), (3, 12), (4, 12)])
+
+
+def test_match_orders_by_coverage(index):
+    matches = index.match([10, 11])
+    assert len(matches) == 3
+    assert list(matches) == [(1, 1.0, 2), (2, 1.0, 1), (3, 2 / 3, 2)]
+    assert matches[1:3] == list(matches)[1:3]
+    assert index.match([10, 11], limit=1) == [(1, 1.0, 2)]
+
+
+@pytest.fixture
+def slow_build(monkeypatch, settings):
+    settings.COOK_INDEX_TTL = 0
+    stale = IngredientIndex()
+    stale.built_at -= 1
+    release = threading.Event()
+    fresh = IngredientIndex.from_pairs([(1, 10), (2, 11)])
+
+    def build_index():
+        release.wait(5)
+        return fresh
+
+    monkeypatch.setattr(matching, '_index', stale)
+    monkeypatch.setattr(matching, '_changes', None)
+    monkeypatch.setattr(matching, 'build_index', build_index)
+    return stale, fresh, release
+
+
+def test_stale_index_served_during_rebuild(slow_build):
+    stale, fresh, release = slow_build
+    assert matching.get_index() is stale
+    assert matching.get_index() is stale
+    release.set()
+    with matching._index_lock:
+        assert matching._index is fresh
+
+
+def test_changes_during_rebuild_replayed(slow_build):
+    stale, fresh, release = slow_build
+    matching.get_index()
+    matching.unindex_recipe(1)
+    matching.apply_change(3, [10])
+    release.set()
+    with matching._index_lock:
+        assert matching._index is fresh
+    assert matching._changes is None
+    assert list(fresh.match([10, 11])) == [(3, 1.0, 1), (2, 1.0, 1)]
+
+
+def test_cook_pages_matches(make_data, monkeypatch):
+    ingredient_id = make_data(3)['ingredient']
+    monkeypatch.setattr(matching, '_index', matching.build_index())
+    data = APIClient().get(
+        f'/api/recipes/cook/?ingredients={ingredient_id}&limit=4').json()
+    assert data['count'] == 6
+    assert len(data['results']) == 4
+    assert [recipe['coverage'] for recipe in data['results']] == [0.5] * 4
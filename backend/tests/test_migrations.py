@@ -0,0 +1,31 @@
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+OLD = [('recipes', '0003_auto_20221012_2010'), ('users', '0001_initial')]
+
+
+def migrate(targets):
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(targets)
+    return executor.loader.project_state(targets).apps
+
+
+@pytest.mark.django_db(transaction=True)
+def test_subscriptions_survive_move_to_users():
+    latest = MigrationExecutor(connection).loader.graph.leaf_nodes()
+    apps = migrate(OLD)
+    User = apps.get_model('users', 'User')
+    author, reader, other = (
+        User.objects.create(username=name, email=f'{name}@example.com')
+        for name in ('author', 'reader', 'other'))
+    OldSubscription = apps.get_model('recipes', 'Subscription')
+    OldSubscription.objects.create(user=reader, following=author)
+    OldSubscription.objects.create(user=other, following=author)
+    apps = migrate(latest)
+    Subscription = apps.get_model('users', 'Subscription')
+    assert set(Subscription.objects.values_list(
+        'user_id', 'following_id')) == {
+            (reader.id, author.id), (other.id, author.id)}
+    Subscription.objects.create(user_id=author.id, following_id=reader.id)
@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+
+from api.warmup import warm_up
+from foodgram.db import pool
+
+
+class FakeConnection:
+    closed = False
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_pools_closes_idle_connections():
+    connections_pool = pool.ConnectionPool(
+        max_size=2, timeout=1, check_interval=30)
+    fake = connections_pool.acquire(FakeConnection)
+    connections_pool.release(fake)
+    pool.pools['test'] = connections_pool
+    try:
+        pool.close_pools()
+    finally:
+        del pool.pools['test']
+    assert not connections_pool.idle
+    assert fake.closed
+
+
+def test_reset_pools_keeps_inherited_connections_open():
+    connections_pool = pool.ConnectionPool(
+        max_size=2, timeout=1, check_interval=30)
+    fake = connections_pool.acquire(FakeConnection)
+    connections_pool.release(fake)
+    saved = dict(pool.pools)
+    pool.pools['test'] = connections_pool
+    try:
+        pool.reset_pools()
+        assert not pool.pools
+    finally:
+        pool.pools.update(saved)
+    assert not fake.closed
+
+
+@pytest.mark.skipif(
+    connection.settings_dict['ENGINE'] != 'foodgram.db.postgresql_pool',
+    reason='Нужен бэкенд PostgreSQL с пулом (DB_POOL=True)')
+def test_warm_up_leaves_no_idle_connections(transactional_db):
+    warm_up()
+    default_pool = pool.pools['default']
+    assert not default_pool.idle
+    assert default_pool.in_use == 0
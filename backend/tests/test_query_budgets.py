@@ -0,0 +1,43 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+
+from foodgram.db.querywatch import QueryBudgetExceeded
+
+
+@pytest.fixture
+def budget_data(make_data):
+    return make_data(10)
+
+
+@pytest.mark.parametrize('name, path', [
+    ('recipes-list', '/api/recipes/?limit=10'),
+    ('recipes-detail', '/api/recipes/{recipe}/'),
+])
+def test_read_within_budget(name, path, reader_client, budget_data,
+                            assert_queries):
+    path = path.format(**budget_data)
+    # Прогрев кэша токенов процесса.
+    reader_client.get(path)
+    with assert_queries(settings.QUERY_BUDGETS[name]):
+        response = reader_client.get(path)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_subscriptions_fields_skip_recipes(reader_client, budget_data,
+                                           assert_queries):
+    path = '/api/users/subscriptions/?limit=10&fields=id,username'
+    reader_client.get(path)
+    # Без счетчика рецептов и их подгрузки остаются подсчет и выборка
+    # страницы авторов.
+    with assert_queries(2):
+        response = reader_client.get(path)
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()['results'][0]) == {'id', 'username'}
+
+
+def test_budget_exceeded(reader_client, budget_data, assert_queries):
+    with pytest.raises(QueryBudgetExceeded):
+        with assert_queries(0):
+            reader_client.get('/api/recipes/?limit=10')
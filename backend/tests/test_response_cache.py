@@ -0,0 +1,20 @@
+from rest_framework.test import APIClient
+
+from recipes.models import Tag
+
+INDENTED = 'application/json; indent=4'
+
+
+def get_tags(accept):
+    return APIClient().get('/api/tags/', HTTP_ACCEPT=accept)
+
+
+def test_indented_response_is_not_served_to_others(db):
+    Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+    indented = get_tags(INDENTED)
+    assert b'\n    ' in indented.content
+    for accept in ('application/json', INDENTED):
+        assert get_tags(accept).content == get_tags(accept).content
+    assert b'\n' not in get_tags('application/json').content
+    assert 'X-Accel-Expires' not in get_tags(INDENTED)
+    assert 'X-Accel-Expires' in get_tags('application/json')
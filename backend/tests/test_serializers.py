@@ -0,0 +1,120 @@
+import random
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.documents import refresh_documents
+from api.lean import RECIPE_EXPANDABLE, serialize_recipes
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, ShoppingCart, Tag,
+    TagRecipe,
+)
+from users.models import Subscription, User
+
+RECIPES_COUNT = 20
+
+
+@pytest.fixture
+def recipes(reader):
+    """Рецепты разных авторов с тегами, продуктами и отметками."""
+    rng = random.Random(42)
+    authors = User.objects.bulk_create([
+        User(username=f'author_{index}', email=f'author_{index}@example.com',
+             first_name='Автор', last_name=str(index))
+        for index in range(4)
+    ])
+    tags = Tag.objects.bulk_create([
+        Tag(name=f'tag_{index}', color=f'#00{index:02d}00',
+            slug=f'tag_{index}')
+        for index in range(4)
+    ])
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(name=f'Продукт {index}', measurement_unit='г')
+        for index in range(20)
+    ])
+    recipes = Recipe.objects.bulk_create([
+        Recipe(author=rng.choice(authors), name=f'Рецепт {index}',
+               image=f'recipes/image/test_{index}.png', text='Описание',
+               cooking_time=rng.randint(1, 300))
+        for index in range(RECIPES_COUNT)
+    ])
+    TagRecipe.objects.bulk_create([
+        TagRecipe(recipe=recipe, tag=tag)
+        for recipe in recipes
+        for tag in rng.sample(tags, 2)
+    ])
+    IngredientAmount.objects.bulk_create([
+        IngredientAmount(recipe=recipe, ingredient=ingredient,
+                         amount=rng.randint(1, 1000))
+        for recipe in recipes
+        for ingredient in rng.sample(ingredients, 4)
+    ])
+    refresh_documents(recipe.id for recipe in recipes)
+    Subscription.objects.bulk_create([
+        Subscription(user=reader, following=author) for author in authors[:2]
+    ])
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create([
+            model(user=reader, recipe=recipe)
+            for recipe in rng.sample(recipes, RECIPES_COUNT // 4)
+        ])
+    return list(Recipe.objects.order_by('-pub_date', '-id'))
+
+
+@pytest.fixture(params=['anonymous', 'reader'])
+def http_request(request, reader):
+    http_request = RequestFactory().get('/api/recipes/')
+    http_request.user = (AnonymousUser() if request.param == 'anonymous'
+                         else reader)
+    return http_request
+
+
+def full_output(recipes, request):
+    """Вывод RecipeSerializer с тегами по id: без сортировки они идут в
+    порядке базы."""
+    return [
+        {**recipe, 'tags': sorted(recipe['tags'], key=lambda tag: tag['id'])}
+        for recipe in RecipeSerializer(
+            recipes, many=True, context={'request': request}).data
+    ]
+
+
+def test_lean_matches_recipe_serializer(recipes, http_request):
+    assert serialize_recipes(recipes, http_request) == full_output(
+        recipes, http_request)
+
+
+def test_lean_fieldset_matches_recipe_serializer(recipes, http_request):
+    fields = ('id', 'author', 'tags', 'is_favorited')
+    assert serialize_recipes(
+        recipes, http_request, fields, set(RECIPE_EXPANDABLE)) == [
+            {field: recipe[field] for field in fields}
+            for recipe in full_output(recipes, http_request)]
+
+
+def test_lean_without_documents_matches(recipes, http_request):
+    Recipe.objects.update(document=None)
+    recipes = list(Recipe.objects.order_by('-pub_date', '-id'))
+    assert serialize_recipes(recipes, http_request) == full_output(
+        recipes, http_request)
+
+
+def test_documents_follow_author_and_catalog(recipes, http_request):
+    author = recipes[0].author
+    author.first_name = 'Новое имя'
+    author.save()
+    ingredient = Ingredient.objects.order_by('id').first()
+    ingredient.measurement_unit = 'кг'
+    ingredient.save()
+    recipes = list(Recipe.objects.order_by('-pub_date', '-id'))
+    assert serialize_recipes(recipes, http_request) == full_output(
+        recipes, http_request)
+
+
+def test_orjson_renderer_matches_json_renderer(recipes, http_request):
+    data = full_output(recipes, http_request)
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
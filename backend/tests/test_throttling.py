@@ -0,0 +1,49 @@
+import pytest
+
+from api import throttling
+from api.throttling import take_token
+
+
+@pytest.fixture
+def rate(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'test': '3/min'},
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [6000.0]
+    monkeypatch.setattr(throttling.time, 'time', lambda: now[0])
+    return now
+
+
+def test_limit_per_period(rate, clock):
+    assert [take_token('test', 'client') for _ in range(3)] == [0, 0, 0]
+    assert 0 < take_token('test', 'client') <= 60
+    assert take_token('test', 'other') == 0
+
+
+def test_rejected_requests_are_not_counted(rate, clock):
+    for _ in range(10):
+        take_token('test', 'client')
+    clock[0] += 60
+    # Окно сдвинулось на период: предыдущее учитывается целиком, и
+    # в нем три пропущенных запроса, а не десять.
+    assert take_token('test', 'client') > 0
+    clock[0] += 20
+    assert take_token('test', 'client') == 0
+
+
+def test_sliding_window(rate, clock):
+    for _ in range(3):
+        take_token('test', 'client')
+    clock[0] += 90
+    # Прошла половина нового окна: от предыдущего остается 1.5 запроса.
+    assert take_token('test', 'client') == 0
+    assert take_token('test', 'client') > 0
+
+
+def test_unknown_scope_is_not_limited(rate, clock):
+    assert take_token('missing', 'client') == 0
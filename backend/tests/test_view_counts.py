@@ -0,0 +1,34 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.view_counts import view_counter
+
+
+@pytest.fixture
+def recipe_id(make_data):
+    return make_data(2)['recipe']
+
+
+def test_cached_detail_views_are_counted(recipe_id,
+                                         django_assert_num_queries):
+    client = APIClient()
+    path = f'/api/recipes/{recipe_id}/'
+    assert client.get(path).status_code == HTTPStatus.OK
+    with django_assert_num_queries(0):
+        response = client.get(path)
+    assert response.status_code == HTTPStatus.OK
+    assert view_counter.counts[recipe_id] == 2
+
+
+def test_detail_is_not_cached_by_nginx(recipe_id):
+    client = APIClient()
+    assert 'X-Accel-Expires' not in client.get(f'/api/recipes/{recipe_id}/')
+    assert 'X-Accel-Expires' in client.get('/api/recipes/')
+
+
+def test_missing_recipe_is_not_counted(db):
+    assert APIClient().get('/api/recipes/0/').status_code == (
+        HTTPStatus.NOT_FOUND)
+    assert not view_counter.counts
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('recipes', '0004_move_subscription_to_users'),
+    ]
+
+    operations = [
+        # Таблицу users_subscription со строками оставляет recipes.0004.
+        # Модель создается до смены типа id пользователя, чтобы вместе с
+        # ним сменился и тип ссылок подписки.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Subscription',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('following', models.ForeignKey(help_text='Выберите автора, на которого подписываются', on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                        ('user', models.ForeignKey(help_text='Выберите пользователя, который подписывается', on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                    ],
+                    options={
+                        'verbose_name': 'Подписка',
+                        'verbose_name_plural': 'Подписки',
+                    },
+                ),
+                migrations.AddConstraint(
+                    model_name='subscription',
+                    constraint=models.UniqueConstraint(fields=('user', 'following'), name='unique_subscribe'),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+    ]
@@ -29,6 +29,12 @@ class User(AbstractUser):
         default=False,
         verbose_name='Подписка на пользователя',
         help_text='Подписка на пользователя')
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата удаления',
+        help_text='Пользователь скрыт и ждет очистки командой purge_deleted')
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
 
@@ -36,6 +42,10 @@ class User(AbstractUser):
         """Параметры модели."""
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='user_deleted_at_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         """Метод строкового представления модели."""
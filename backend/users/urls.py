@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -17,3 +18,6 @@ urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.STATELESS_AUTH:
+    urlpatterns.append(path('auth/', include('djoser.urls.jwt')))